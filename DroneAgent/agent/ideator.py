@@ -5,27 +5,252 @@ Generates creative, non-repetitive drone industry content using multiple AI back
 
 import os
 import json
+import asyncio
 import logging
 import random
 import re
 import hashlib
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
-from datetime import datetime
+import copy
+import functools
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Any, Tuple, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv, find_dotenv
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.logger import setup_logger
+from utils import json_utils
+from utils.cache import ResponseCache
 
 logger = setup_logger(__name__)
 
+# Load environment variables once per process: the nearest .env from the
+# working directory upwards, falling back to the user's home directory
+_DOTENV_PATH = find_dotenv(usecwd=True) or os.path.expanduser('~/.env')
+if os.path.exists(_DOTENV_PATH):
+    load_dotenv(_DOTENV_PATH)
+    logger.info(f"Loaded environment from {_DOTENV_PATH}")
+else:
+    logger.warning("No .env file found in standard locations")
 
-@dataclass
+# Precompiled pattern used on every parsed idea
+_PUNCT_RE = re.compile(r'[^\w\s]')
+
+# Tweet markers in thread responses: "Tweet ...[: content]" or "<n>: content"
+_TWEET_MARKER_RE = re.compile(r'(?:[Tt]weet [^:]*(?::(.*))?|(\d+):(.*))', re.DOTALL)
+
+# Non-empty lines of a response, matched one at a time
+_NON_EMPTY_LINE_RE = re.compile(r'.+')
+
+# Sentence boundaries for fallback thread splitting: after a period, or at a line break
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=\.)\s+|\s*\n\s*')
+
+# Fallback parsing stops once this many tweets are built
+_MAX_FALLBACK_TWEETS = 10
+
+# Boilerplate sales phrases stripped from generated threads
+_REPETITIVE_PHRASES = (
+    "Includes premium carrying case for safe transport",
+    "Volume discounts available for businesses",
+    "Industry-leading warranty covers all components",
+    "Limited production run selling out fast",
+    "Free training session with every purchase",
+    "Compatible with all standard mounting equipment",
+)
+_REPETITIVE_RE = re.compile('|'.join(map(re.escape, _REPETITIVE_PHRASES)))
+
+# Keywords that make a tweet worth illustrating
+_IMAGE_KEYWORD_RE = re.compile(r'technique|tip|example|show|look|see|visual|photo|shot', re.IGNORECASE)
+
+# Terms that mark an idea as drone-related
+_DRONE_TERMS_RE = re.compile(r'drone|uav|quadcopter|multirotor|aerial|flight|aviation', re.IGNORECASE)
+
+# Decoder used to pull the first JSON value out of free-form AI responses
+_JSON_DECODER = json.JSONDecoder()
+
+# Decode errors this close to the end of a streamed buffer may just be a truncated
+# literal or escape (e.g. 'tru', '\\u00'), so more data is awaited before giving up
+_JSON_TRUNCATION_SLACK = 6
+
+# Most text buffered while waiting for one streamed JSON element to complete
+_STREAM_BUFFER_LIMIT = 256 * 1024
+
+# Common words ignored when extracting key phrases
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'
+})
+
+# Persona used for every thread generation request
+_THREAD_SYSTEM_PROMPT = "You are an expert drone engineer, have profound knowledge in unmanned aerial systems, PHD in aerospace engineering, have skills of FPV flying, drone building, IOT+Drone systems, cinematography and content creation. Create engaging, educational Twitter threads with unique insights and zero repetition."
+
+# Threads kept for reuse by themes with the same terms; the oldest are dropped first
+_THREAD_CACHE_SIZE = 64
+
+# Idea classification tables (keywords are lowercase; matched against lowercased content)
+_BASE_HASHTAGS = ('#drone', '#drones', '#UAV', '#droneindustry')
+
+_CATEGORY_HASHTAGS = {
+    'Technology': ('#dronetech', '#innovation', '#technology'),
+    'Business': ('#dronebusiness', '#commercialdrones', '#dronesolutions'),
+    'Regulations': ('#droneregulations', '#FAA', '#dronesafety'),
+    'Applications': ('#droneapplications', '#droneuse', '#dronesolutions'),
+    'Education': ('#droneeducation', '#dronetraining', '#learntofly'),
+    'Market Analysis': ('#dronemarket', '#droneinvestment', '#dronetrends')
+}
+
+# Characters dropped when turning a keyword into a hashtag
+_HASHTAG_STRIP = str.maketrans('', '', " -_/.,")
+
+_HIGH_ENGAGEMENT_CATEGORIES = ('Technology', 'Applications')
+
+_TRENDING_KEYWORDS = (
+    'ai', 'autonomous', 'delivery', 'inspection', 'mapping',
+    'agriculture', 'surveillance', 'racing', 'fpv', '4k', '8k'
+)
+
+_PILLAR_KEYWORDS = {
+    'Education': ('tutorial', 'guide', 'learn', 'how to', 'beginner', 'training'),
+    'Innovation': ('new', 'latest', 'breakthrough', 'cutting-edge', 'advanced', 'future'),
+    'Business': ('roi', 'profit', 'business', 'commercial', 'investment', 'market'),
+    'Safety': ('safety', 'regulation', 'compliance', 'legal', 'risk', 'secure'),
+    'Entertainment': ('racing', 'fpv', 'photography', 'videography', 'fun', 'hobby')
+}
+
+_AUDIENCE_INDICATORS = {
+    'Professionals': ('commercial', 'business', 'professional', 'enterprise', 'industry'),
+    'Hobbyists': ('hobby', 'fun', 'recreational', 'personal', 'diy'),
+    'Developers': ('software', 'programming', 'code', 'development', 'api'),
+    'Pilots': ('pilot', 'flying', 'flight', 'control', 'navigation'),
+    'Beginners': ('beginner', 'start', 'introduction', 'basic', 'first time')
+}
+
+_CLASSIFIER_KEYWORDS = frozenset(_TRENDING_KEYWORDS).union(
+    *_PILLAR_KEYWORDS.values(), *_AUDIENCE_INDICATORS.values()
+)
+
+# Keywords recognised in fallback idea text, paired with their lowercase form
+_DRONE_KEYWORDS = tuple((keyword, keyword.lower()) for keyword in (
+    'mapping', 'surveying', 'inspection', 'photography', 'videography',
+    'agriculture', 'construction', 'security', 'delivery', 'racing',
+    'FPV', 'autonomous', 'AI', 'sensors', 'gimbal', 'battery',
+    'regulations', 'Part107', 'commercial', 'professional'
+))
+
+# Offline idea templates used when no AI backend is available; each
+# {placeholder} is filled from the matching entry in "values" (placeholder
+# names are unique across templates)
+_FALLBACK_IDEA_TEMPLATES = (
+    {
+        "title": "Advanced Drone Mapping Techniques for {industry}",
+        "description": "Explore cutting-edge photogrammetry and LiDAR integration for precision {application} with sub-centimeter accuracy and automated workflow optimization.",
+        "category": "Technology",
+        "values": {
+            "industry": ("Construction", "Agriculture", "Mining", "Infrastructure"),
+            "application": ("surveying", "monitoring", "inspection", "analysis")
+        }
+    },
+    {
+        "title": "ROI Analysis: Commercial Drone Deployment in {sector}",
+        "description": "Comprehensive cost-benefit analysis of drone implementation for {use_case}, including equipment costs, training investment, and projected savings.",
+        "category": "Business",
+        "values": {
+            "sector": ("Real Estate", "Insurance", "Security", "Logistics"),
+            "use_case": ("property assessment", "claims processing", "perimeter monitoring", "inventory management")
+        }
+    },
+    {
+        "title": "Regulatory Update: {regulation} Impact on Drone Operations",
+        "description": "Latest {regulation} requirements for commercial drone pilots, including compliance strategies and operational adaptations for continued legal flight operations.",
+        "category": "Regulations",
+        "values": {
+            "regulation": ("Part 107", "Remote ID", "BVLOS", "Urban Air Mobility")
+        }
+    },
+    {
+        "title": "Technical Deep-dive: {technology} in Modern Drones",
+        "description": "Engineering analysis of {technology} implementation, performance characteristics, and practical applications in professional drone operations.",
+        "category": "Technology",
+        "values": {
+            "technology": ("AI-powered obstacle avoidance", "Swarm intelligence", "Edge computing", "Advanced sensor fusion")
+        }
+    }
+)
+
+# Hand-written threads used when AI generation fails, keyed by theme
+_EXPERT_THREADS: Dict[str, Tuple[str, ...]] = {
+    "The Art of Drone Cinematography: Pro Tips": (
+        "🎬 Drone cinematography has evolved from novelty to necessity. What once required $100k helicopter rentals now fits in your backpack. Here's what separates amateur footage from cinematic gold...",
+        
+        "First rule: Motion tells the story. Static hovering shots scream 'amateur.' Professional pilots use reveal shots - starting close, pulling back to show scale and context.",
+        
+        "Camera settings matter more than your drone. Shoot in D-Log or flat profiles, 24fps for cinematic feel, 1/48 shutter speed. Always shoot in 4K even if delivering 1080p.",
+        
+        "Master the 'invisible' movements: slow accelerations, gentle curves, purposeful height changes. Jerky movements break immersion instantly.",
+        
+        "Lighting is everything. Golden hour isn't just prettier - it's forgiving. Harsh midday sun creates unflattering shadows and blown highlights.",
+        
+        "Pre-plan your shots with apps like Litchi or DroneDeploy. Knowing your flight path saves battery and ensures smooth, repeatable movements.",
+        
+        "Sound design matters too. Drone footage needs audio - wind, environment, music. The propeller buzz should never make it to your final edit.",
+        
+        "Learn these essential shots: dolly zoom, orbital, dronie, tilt reveal, top-down pattern shots. Each serves a specific storytelling purpose.",
+        
+        "Post-production is where magic happens. Color grading flat profiles, stabilization in post, speed ramping for dramatic effect.",
+        
+        "Ready to master aerial storytelling? 🚁\n🔗 Full cinematic guide: https://cryomech01.gumroad.com\n📧 Get pro techniques + presets\n🐦 Follow for daily tips\n\nDrop a 🎬 if you're ready!"
+    )
+}
+
+# Shared HTTP session so all backends reuse pooled keep-alive connections.
+# Transient rate-limit/gateway errors are retried with backoff; the final
+# response is still returned so callers can raise_for_status() as before.
+# Read timeouts are not retried: the POST may already be generating (and billed),
+# and each retry would add another full timeout.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=64,
+    max_retries=Retry(
+        total=3,
+        read=0,
+        backoff_factor=0.5,
+        status_forcelist=[429, 502, 503, 504],
+        allowed_methods=frozenset({'GET', 'POST'}),
+        raise_on_status=False
+    )
+))
+
+
+# (epoch second, formatted timestamp) of the last _utc_timestamp() call
+_last_timestamp: Tuple[int, str] = (-1, '')
+
+
+def _utc_timestamp() -> str:
+    """Current UTC time as an ISO-8601 string with second precision"""
+    global _last_timestamp
+    second = int(time.time())
+    cached_second, formatted = _last_timestamp
+    if second != cached_second:
+        # Only format once per second; the tuple swap keeps concurrent callers consistent
+        formatted = datetime.fromtimestamp(second, timezone.utc).isoformat()
+        _last_timestamp = (second, formatted)
+    return formatted
+
+
+@dataclass(frozen=True)
 class ContentConfig:
-    """Configuration class for content generation parameters"""
+    """Configuration class for content generation parameters (immutable; use dataclasses.replace)"""
     max_title_length: int = 100
     max_description_length: int = 280
     max_tweet_length: int = 280
@@ -33,6 +258,13 @@ class ContentConfig:
     max_tweets_per_thread: int = 15
     timeout_seconds: int = 30
     max_retries: int = 3
+    preferred_categories: Optional[Tuple[str, ...]] = None
+    preferred_complexity: Optional[str] = None
+    max_ideas_per_request: Optional[int] = None
+
+
+# Shared default so ideators without an explicit config don't each allocate one
+_DEFAULT_CONFIG = ContentConfig()
 
 
 class APIBackend:
@@ -42,10 +274,125 @@ class APIBackend:
         self.api_key = api_key
         self.model_name = model_name
         self.logger = logging.getLogger(f"{self.__class__.__name__}")
+        self.response_cache: Optional[ResponseCache] = None
     
     def generate_content(self, prompt: str, system_prompt: str = None) -> str:
         """Generate content using the AI backend"""
         raise NotImplementedError("Subclasses must implement generate_content")
+    
+    def generate_cached(self, prompt: str, system_prompt: str = None) -> str:
+        """generate_content, served from the response cache when one is attached"""
+        if self.response_cache is None:
+            return self.generate_content(prompt, system_prompt)
+        
+        key = ResponseCache.make_key(self.__class__.__name__, self.model_name, system_prompt, prompt)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            self.logger.info(f"Using cached {self.model_name} response")
+            return cached
+        
+        content = self.generate_content(prompt, system_prompt)
+        self.response_cache.set(key, content)
+        return content
+    
+    async def generate_content_async(self, prompt: str, system_prompt: str = None) -> str:
+        """Run generate_cached in a worker thread so several requests can overlap"""
+        return await asyncio.to_thread(self.generate_cached, prompt, system_prompt)
+    
+    def generate_content_stream(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """Yield the completion incrementally; backends without streaming yield it whole"""
+        yield self.generate_cached(prompt, system_prompt)
+
+
+def _iter_sse_events(response) -> Iterator[Any]:
+    """Yield the decoded JSON payload of each server-sent event until [DONE]"""
+    for line in response.iter_lines():
+        if not line.startswith(b'data: '):
+            continue
+        
+        data = line[6:]
+        if data == b'[DONE]':
+            break
+        
+        yield json_utils.loads(data)
+
+
+def _iter_sse_content(response) -> Iterator[str]:
+    """Yield content deltas from an OpenAI-compatible server-sent event stream"""
+    for chunk in _iter_sse_events(response):
+        choices = chunk.get('choices')
+        if choices:
+            delta = choices[0].get('delta', {}).get('content')
+            if delta:
+                yield delta
+
+
+def _iter_json_array_items(chunks: Iterator[str]) -> Iterator[Any]:
+    """Yield each element of the first JSON array in a streamed response as soon as it is complete"""
+    buffer = ""
+    position = None  # Next unread index inside the candidate array at buffer[0], once its '[' has arrived
+    yielded = False
+    
+    for chunk in chunks:
+        buffer += chunk
+        
+        while True:
+            if position is None:
+                start = buffer.find('[')
+                if start == -1:
+                    buffer = ""  # Nothing read so far can start the array
+                    break
+                buffer = buffer[start:]
+                position = 1
+                
+            # Skip separators between elements
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                break
+            if buffer[position] == ']':
+                if yielded:
+                    return
+                # An empty array in the preamble (e.g. "[]"); keep looking
+                buffer, position = buffer[position + 1:], None
+                continue
+                
+            try:
+                item, end = _JSON_DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                if e.pos >= len(buffer) - _JSON_TRUNCATION_SLACK or e.msg.startswith('Unterminated string'):
+                    break  # Element still incomplete; wait for more data
+                if yielded:
+                    return  # Malformed after the items already yielded
+                # Not JSON after all (e.g. "[see below]"), so try the next '['
+                buffer, position = buffer[1:], None
+                continue
+                
+            # Objects, arrays and strings end on their own delimiter, but a number
+            # or literal may continue in the next chunk until a ',' or ']' arrives
+            if buffer[position] not in '{["' and buffer[end:].lstrip(' \t\r\n')[:1] not in (',', ']'):
+                break
+            position = end
+            yielded = True
+            yield item
+            
+        if len(buffer) > _STREAM_BUFFER_LIMIT:
+            logger.warning("Streamed JSON element exceeds the buffer limit, giving up")
+            return
+            
+        # Once the array is confirmed, drop consumed text so the buffer only holds the pending element
+        if yielded:
+            buffer = buffer[position:]
+            position = 0
+
+
+def _iter_sentences(content: str) -> Iterator[str]:
+    """Lazily split content on sentence boundaries so callers can stop early"""
+    start = 0
+    for boundary in _SENTENCE_SPLIT_RE.finditer(content):
+        yield content[start:boundary.start()]
+        start = boundary.end()
+    yield content[start:]
 
 
 class GeminiBackend(APIBackend):
@@ -58,13 +405,87 @@ class GeminiBackend(APIBackend):
     def generate_content(self, prompt: str, system_prompt: str = None) -> str:
         url = f"{self.base_url}/{self.model_name}:generateContent"
         
+        payload = self._build_request(prompt, system_prompt)
+        headers = {"Content-Type": "application/json"}
+        params = {"key": self.api_key}
+        
+        response = _SESSION.post(url, data=json_utils.dumps(payload), headers=headers, params=params, timeout=30)
+        response.raise_for_status()
+        
+        data = json_utils.loads(response.content)
+        if "candidates" in data and data["candidates"]:
+            return data["candidates"][0]["content"]["parts"][0]["text"]
+        else:
+            raise ValueError("No valid response from Gemini API")
+    
+    def generate_content_stream(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """Yield the completion incrementally as the server streams it"""
+        url = f"{self.base_url}/{self.model_name}:streamGenerateContent"
+        payload = self._build_request(prompt, system_prompt)
+        headers = {"Content-Type": "application/json"}
+        params = {"key": self.api_key, "alt": "sse"}
+        
+        with _SESSION.post(url, data=json_utils.dumps(payload), headers=headers, params=params, timeout=30,
+                           stream=True) as response:
+            response.raise_for_status()
+            for chunk in _iter_sse_events(response):
+                for candidate in chunk.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+    
+    def generate_content_batch(self, prompts: Dict[str, str], system_prompt: str = None,
+                               poll_interval: float = 30.0, max_wait: float = 24 * 3600) -> Dict[str, str]:
+        """Run keyed prompts through the Gemini Batch API; returns text for each key that succeeded"""
+        url = f"{self.base_url}/{self.model_name}:batchGenerateContent"
+        params = {"key": self.api_key}
+        payload = {
+            "batch": {
+                "display_name": f"drone-agent-{int(time.time())}",
+                "input_config": {"requests": {"requests": [
+                    {"request": self._build_request(prompt, system_prompt), "metadata": {"key": key}}
+                    for key, prompt in prompts.items()
+                ]}}
+            }
+        }
+        
+        response = _SESSION.post(url, data=json_utils.dumps(payload), headers={"Content-Type": "application/json"},
+                                 params=params, timeout=60)
+        response.raise_for_status()
+        operation = json_utils.loads(response.content)
+        
+        # Batch jobs are asynchronous; poll the operation until it finishes
+        status_url = f"https://generativelanguage.googleapis.com/v1beta/{operation['name']}"
+        deadline = time.monotonic() + max_wait
+        while not operation.get("done"):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Gemini batch {operation['name']} did not finish in {max_wait}s")
+            time.sleep(poll_interval)
+            response = _SESSION.get(status_url, params=params, timeout=30)
+            response.raise_for_status()
+            operation = json_utils.loads(response.content)
+        
+        if "error" in operation:
+            raise ValueError(f"Gemini batch failed: {operation['error'].get('message')}")
+        
+        results = {}
+        inlined = operation.get("response", {}).get("inlinedResponses", {}).get("inlinedResponses", [])
+        for item in inlined:
+            key = item.get("metadata", {}).get("key")
+            candidates = item.get("response", {}).get("candidates")
+            if key is not None and candidates:
+                results[key] = candidates[0]["content"]["parts"][0]["text"]
+        return results
+    
+    def _build_request(self, prompt: str, system_prompt: str = None) -> Dict[str, Any]:
+        """Build the generateContent request body"""
         content_parts = []
         if system_prompt:
             content_parts.append({"text": f"System: {system_prompt}\n\nUser: {prompt}"})
         else:
             content_parts.append({"text": prompt})
         
-        payload = {
+        return {
             "contents": [{"parts": content_parts}],
             "generationConfig": {
                 "temperature": 0.8,
@@ -73,18 +494,6 @@ class GeminiBackend(APIBackend):
                 "maxOutputTokens": 2048,
             }
         }
-        
-        headers = {"Content-Type": "application/json"}
-        params = {"key": self.api_key}
-        
-        response = requests.post(url, json=payload, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        if "candidates" in data and data["candidates"]:
-            return data["candidates"][0]["content"]["parts"][0]["text"]
-        else:
-            raise ValueError("No valid response from Gemini API")
 
 
 class PerplexityBackend(APIBackend):
@@ -95,6 +504,26 @@ class PerplexityBackend(APIBackend):
         self.base_url = "https://api.perplexity.ai/chat/completions"
     
     def generate_content(self, prompt: str, system_prompt: str = None) -> str:
+        payload, headers = self._build_request(prompt, system_prompt)
+        
+        response = _SESSION.post(self.base_url, data=json_utils.dumps(payload), headers=headers, timeout=30)
+        response.raise_for_status()
+        
+        data = json_utils.loads(response.content)
+        return data["choices"][0]["message"]["content"]
+    
+    def generate_content_stream(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """Yield the completion incrementally as the server streams it"""
+        payload, headers = self._build_request(prompt, system_prompt)
+        payload["stream"] = True
+        
+        with _SESSION.post(self.base_url, data=json_utils.dumps(payload), headers=headers, timeout=30,
+                           stream=True) as response:
+            response.raise_for_status()
+            yield from _iter_sse_content(response)
+    
+    def _build_request(self, prompt: str, system_prompt: str = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Build the chat-completions payload and headers"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -112,11 +541,7 @@ class PerplexityBackend(APIBackend):
             "Content-Type": "application/json"
         }
         
-        response = requests.post(self.base_url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
+        return payload, headers
 
 
 class OpenRouterBackend(APIBackend):
@@ -127,6 +552,26 @@ class OpenRouterBackend(APIBackend):
         self.base_url = "https://openrouter.ai/api/v1/chat/completions"
     
     def generate_content(self, prompt: str, system_prompt: str = None) -> str:
+        payload, headers = self._build_request(prompt, system_prompt)
+        
+        response = _SESSION.post(self.base_url, data=json_utils.dumps(payload), headers=headers, timeout=30)
+        response.raise_for_status()
+        
+        data = json_utils.loads(response.content)
+        return data["choices"][0]["message"]["content"]
+    
+    def generate_content_stream(self, prompt: str, system_prompt: str = None) -> Iterator[str]:
+        """Yield the completion incrementally as the server streams it"""
+        payload, headers = self._build_request(prompt, system_prompt)
+        payload["stream"] = True
+        
+        with _SESSION.post(self.base_url, data=json_utils.dumps(payload), headers=headers, timeout=30,
+                           stream=True) as response:
+            response.raise_for_status()
+            yield from _iter_sse_content(response)
+    
+    def _build_request(self, prompt: str, system_prompt: str = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """Build the chat-completions payload and headers"""
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -146,11 +591,7 @@ class OpenRouterBackend(APIBackend):
             "X-Title": "Drone Industry Content Generator"
         }
         
-        response = requests.post(self.base_url, json=payload, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        return data["choices"][0]["message"]["content"]
+        return payload, headers
 
 
 class ContentDeduplicator:
@@ -164,57 +605,79 @@ class ContentDeduplicator:
     
     def add_used_content(self, content: str, content_type: str = "general"):
         """Add content to the deduplication tracking"""
-        content_hash = hashlib.md5(content.lower().strip().encode()).hexdigest()
-        self.content_hashes.add(content_hash)
+        content_hash = self._hash_content(content)
         
-        # Extract key phrases for phrase-level deduplication
-        phrases = self._extract_key_phrases(content)
-        self.used_phrases.update(phrases)
+        # Phrases of already-tracked content are recorded already
+        if content_hash not in self.content_hashes:
+            self.content_hashes.add(content_hash)
+            
+            # Extract key phrases for phrase-level deduplication
+            self.used_phrases.update(self._extract_key_phrases(content))
         
         if content_type == "topic":
             self.used_topics.add(content.lower().strip())
     
     def is_content_unique(self, content: str, similarity_threshold: float = 0.8) -> bool:
         """Check if content is sufficiently unique"""
-        content_hash = hashlib.md5(content.lower().strip().encode()).hexdigest()
+        content_hash = self._hash_content(content)
         if content_hash in self.content_hashes:
             return False
         
-        # Check phrase-level similarity
-        content_phrases = self._extract_key_phrases(content)
-        if not content_phrases:
-            return True
+        return self._is_phrase_unique(self._extract_key_phrases(content), similarity_threshold)
+    
+    def try_add_unique(self, content: str, similarity_threshold: float = 0.8,
+                       content_type: str = "general") -> bool:
+        """Record content if it is sufficiently unique; returns whether it was added"""
+        content_hash = self._hash_content(content)
+        if content_hash in self.content_hashes:
+            return False
+        
+        # Extract phrases once for both the similarity check and tracking
+        phrases = self._extract_key_phrases(content)
+        if not self._is_phrase_unique(phrases, similarity_threshold):
+            return False
+        
+        self.content_hashes.add(content_hash)
+        self.used_phrases.update(phrases)
+        if content_type == "topic":
+            self.used_topics.add(content.lower().strip())
         
-        overlap_count = sum(1 for phrase in content_phrases if phrase in self.used_phrases)
-        similarity = overlap_count / len(content_phrases)
+        return True
+    
+    def filter_unique_titles(self, titles: List[str], similarity_threshold: float = 0.8) -> List[int]:
+        """Return indices of unique titles, recording each accepted title as a used topic"""
+        return [
+            index for index, title in enumerate(titles)
+            if self.try_add_unique(title, similarity_threshold, "topic")
+        ]
+    
+    def _is_phrase_unique(self, phrases: List[str], similarity_threshold: float) -> bool:
+        """Check phrase-level similarity against previously used phrases"""
+        if not phrases:
+            return True
         
-        return similarity < similarity_threshold
+        overlap_count = sum(1 for phrase in phrases if phrase in self.used_phrases)
+        return overlap_count / len(phrases) < similarity_threshold
+    
+    @staticmethod
+    def _hash_content(content: str) -> bytes:
+        """Return a compact 16-byte fingerprint of normalized content"""
+        return hashlib.blake2b(content.lower().strip().encode('utf-8'), digest_size=16).digest()
     
     def _extract_key_phrases(self, content: str) -> List[str]:
         """Extract key phrases from content for deduplication"""
-        # Remove common words and extract meaningful phrases
-        stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those'
-        }
-        
         # Clean and tokenize
-        clean_content = re.sub(r'[^\w\s]', ' ', content.lower())
-        words = clean_content.split()
+        words = _PUNCT_RE.sub(' ', content.lower()).split()
+        is_stop = [word in _STOP_WORDS for word in words]
         
         # Extract 2-3 word phrases that don't consist entirely of stop words
         phrases = []
-        for i in range(len(words) - 1):
-            phrase = ' '.join(words[i:i+2])
-            if not all(word in stop_words for word in words[i:i+2]):
-                phrases.append(phrase)
-        
-        for i in range(len(words) - 2):
-            phrase = ' '.join(words[i:i+3])
-            if not all(word in stop_words for word in words[i:i+3]):
-                phrases.append(phrase)
+        count = len(words)
+        for i in range(count - 1):
+            if not (is_stop[i] and is_stop[i + 1]):
+                phrases.append(words[i] + ' ' + words[i + 1])
+            if i < count - 2 and not (is_stop[i] and is_stop[i + 1] and is_stop[i + 2]):
+                phrases.append(words[i] + ' ' + words[i + 1] + ' ' + words[i + 2])
         
         return phrases
 
@@ -222,24 +685,29 @@ class ContentDeduplicator:
 class ContentIdeator:
     """Generates creative content ideas for the drone industry"""
     
-    def __init__(self, config: ContentConfig = None):
-        self.config = config or ContentConfig()
+    def __init__(self, config: ContentConfig = None, cache_enabled: bool = False):
+        self.config = config or _DEFAULT_CONFIG
         self.logger = logging.getLogger(self.__class__.__name__)
         self.deduplicator = ContentDeduplicator()
-        self._load_environment()
         self._setup_logging()
-    
-    def _load_environment(self):
-        """Load environment variables from multiple possible locations"""
-        env_paths = ['.env', '../.env', '../../.env', os.path.expanduser('~/.env')]
         
-        for path in env_paths:
-            if os.path.exists(path):
-                load_dotenv(path)
-                self.logger.info(f"Loaded environment from {path}")
-                break
-        else:
-            self.logger.warning("No .env file found in standard locations")
+        # API keys are read once; a missing key is reported when its backend is requested
+        self.gemini_key = os.getenv('GEMINI_API_KEY')
+        self.perplexity_key = os.getenv('PERPLEXITY_API_KEY')
+        self.openrouter_key = os.getenv('OPENROUTER_API_KEY')
+        self._perplexity_headers = {
+            "Authorization": f"Bearer {self.perplexity_key}",
+            "Content-Type": "application/json"
+        }
+        self._backend_cache: Dict[str, APIBackend] = {}
+        
+        # Optional memory + disk cache of raw model responses. Off by default:
+        # identical prompts would otherwise keep returning the same ideas.
+        self._response_cache = ResponseCache('ideator_responses') if cache_enabled else None
+        
+        # Threads generated this session, keyed by (theme terms, tweet count), so
+        # reworded themes can reuse them (also only when caching is enabled)
+        self._thread_cache: 'OrderedDict[Tuple[frozenset, int], Dict]' = OrderedDict()
     
     def _setup_logging(self):
         """Setup logging configuration"""
@@ -249,30 +717,36 @@ class ContentIdeator:
         )
     
     def _get_backend(self, model_name: str) -> APIBackend:
+        """Return the backend for a model name, creating it on first use"""
+        backend = self._backend_cache.get(model_name)
+        if backend is None:
+            backend = self._create_backend(model_name)
+            backend.response_cache = self._response_cache
+            self._backend_cache[model_name] = backend
+        return backend
+    
+    def _create_backend(self, model_name: str) -> APIBackend:
         """Create appropriate backend based on model name"""
         model_lower = model_name.lower()
         
         if 'gemini' in model_lower:
-            api_key = os.getenv('GEMINI_API_KEY')
-            if not api_key:
+            if not self.gemini_key:
                 raise ValueError("GEMINI_API_KEY not found in environment variables")
             
             if 'flash' in model_lower:
-                return GeminiBackend(api_key, "gemini-1.5-flash")
+                return GeminiBackend(self.gemini_key, "gemini-1.5-flash")
             else:
-                return GeminiBackend(api_key, "gemini-1.5-pro")
+                return GeminiBackend(self.gemini_key, "gemini-1.5-pro")
         
         elif 'perplexity' in model_lower:
-            api_key = os.getenv('PERPLEXITY_API_KEY')
-            if not api_key:
+            if not self.perplexity_key:
                 raise ValueError("PERPLEXITY_API_KEY not found in environment variables")
-            return PerplexityBackend(api_key)
+            return PerplexityBackend(self.perplexity_key)
         
         elif 'openrouter' in model_lower:
-            api_key = os.getenv('OPENROUTER_API_KEY')
-            if not api_key:
+            if not self.openrouter_key:
                 raise ValueError("OPENROUTER_API_KEY not found in environment variables")
-            return OpenRouterBackend(api_key)
+            return OpenRouterBackend(self.openrouter_key)
         
         else:
             raise ValueError(f"Unsupported model: {model_name}")
@@ -283,8 +757,125 @@ class ContentIdeator:
         
         try:
             backend = self._get_backend(model_name)
+            prompt, system_prompt = self._create_ideas_prompt(num_ideas)
+            response = backend.generate_cached(prompt, system_prompt)
+            return self._build_ideas_result(response, model_name, num_ideas)
+            
+        except Exception as e:
+            self.logger.error(f"Error generating ideas with {model_name}: {str(e)}")
+            return self._generate_fallback_ideas(num_ideas)
+    
+    def iter_ideas(self, model_name: str = "Gemini Pro", num_ideas: int = 10) -> Iterator[Dict[str, Any]]:
+        """Stream ideas from a model, yielding each processed idea as soon as it arrives"""
+        logger.info(f"Streaming {num_ideas} ideas from {model_name}")
+        
+        yielded = 0
+        try:
+            backend = self._get_backend(model_name)
+            prompt, system_prompt = self._create_ideas_prompt(num_ideas)
+            chunks = backend.generate_content_stream(prompt, system_prompt)
             
-            system_prompt = """You are an expert drone industry analyst and content creator. Generate highly specific, technical, and engaging content ideas that provide real value to drone professionals, enthusiasts, and businesses. 
+            for idea in _iter_json_array_items(chunks):
+                candidate = self._normalize_idea(idea)
+                if candidate is None or not self.deduplicator.try_add_unique(candidate['title'], content_type="topic"):
+                    continue
+                yield self._process_and_enhance_ideas([candidate])[0]
+                yielded += 1
+                
+        except Exception as e:
+            self.logger.error(f"Error streaming ideas from {model_name}: {str(e)}")
+        
+        if not yielded:
+            self.logger.warning(f"No valid ideas streamed from {model_name}, using fallback")
+            yield from self._generate_fallback_ideas(num_ideas)['ideas']
+    
+    async def generate_ideas_async(self, model_names: List[str], num_ideas: int = 10,
+                                   max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Generate ideas from several models concurrently, returning one result per model"""
+        logger.info(f"Generating {num_ideas} ideas concurrently using {', '.join(model_names)}")
+        
+        prompt, system_prompt = self._create_ideas_prompt(num_ideas)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        generated_at = _utc_timestamp()
+        
+        async def _generate(model_name: str) -> Dict[str, Any]:
+            try:
+                backend = self._get_backend(model_name)
+                async with semaphore:
+                    response = await backend.generate_content_async(prompt, system_prompt)
+                return self._build_ideas_result(response, model_name, num_ideas, generated_at)
+            except Exception as e:
+                self.logger.error(f"Error generating ideas with {model_name}: {str(e)}")
+                return self._generate_fallback_ideas(num_ideas, generated_at)
+        
+        return await asyncio.gather(*(_generate(model_name) for model_name in model_names))
+    
+    def generate_ideas_batch(self, model_names: List[str], num_ideas: int = 10,
+                             max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Synchronous wrapper around generate_ideas_async"""
+        return asyncio.run(self.generate_ideas_async(model_names, num_ideas, max_concurrency))
+    
+    async def generate_ideas_first_async(self, model_names: List[str], num_ideas: int = 10) -> Dict[str, Any]:
+        """Query several models concurrently and return ideas from the first usable response"""
+        logger.info(f"Racing {', '.join(model_names)} for {num_ideas} ideas")
+        
+        prompt, system_prompt = self._create_ideas_prompt(num_ideas)
+        
+        async def _request(model_name: str) -> Tuple[str, Optional[str]]:
+            try:
+                backend = self._get_backend(model_name)
+                return model_name, await backend.generate_content_async(prompt, system_prompt)
+            except Exception as e:
+                self.logger.error(f"Error generating ideas with {model_name}: {str(e)}")
+                return model_name, None
+        
+        tasks = [asyncio.create_task(_request(model_name)) for model_name in model_names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                model_name, response = await next_done
+                # Only the winner is parsed, so losing responses never reach the deduplicator
+                if response and self._extract_json_from_response(response):
+                    return self._build_ideas_result(response, model_name, num_ideas)
+        finally:
+            # Requests already running in worker threads finish in the background
+            for task in tasks:
+                task.cancel()
+        
+        self.logger.warning("No model returned usable ideas, using fallback")
+        return self._generate_fallback_ideas(num_ideas)
+    
+    def generate_ideas_first(self, model_names: List[str], num_ideas: int = 10) -> Dict[str, Any]:
+        """Synchronous counterpart of generate_ideas_first_async"""
+        logger.info(f"Racing {', '.join(model_names)} for {num_ideas} ideas")
+        
+        prompt, system_prompt = self._create_ideas_prompt(num_ideas)
+        
+        def _request(model_name: str) -> str:
+            return self._get_backend(model_name).generate_cached(prompt, system_prompt)
+        
+        # Not asyncio.run(): it would wait for the losing requests' threads on exit
+        executor = ThreadPoolExecutor(max_workers=max(len(model_names), 1))
+        futures = {executor.submit(_request, model_name): model_name for model_name in model_names}
+        try:
+            for future in as_completed(futures):
+                model_name = futures[future]
+                try:
+                    response = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error generating ideas with {model_name}: {str(e)}")
+                    continue
+                
+                if response and self._extract_json_from_response(response):
+                    return self._build_ideas_result(response, model_name, num_ideas)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        self.logger.warning("No model returned usable ideas, using fallback")
+        return self._generate_fallback_ideas(num_ideas)
+    
+    def _create_ideas_prompt(self, num_ideas: int) -> Tuple[str, str]:
+        """Create the user and system prompts for idea generation"""
+        system_prompt = """You are an expert drone industry analyst and content creator. Generate highly specific, technical, and engaging content ideas that provide real value to drone professionals, enthusiasts, and businesses. 
 
 Focus on:
 - Latest technological innovations and breakthroughs
@@ -295,8 +886,8 @@ Focus on:
 - Industry insights and expert perspectives
 
 Avoid generic advice and focus on actionable, specific insights."""
-            
-            prompt = f"""Generate {num_ideas} unique and creative content ideas for the drone industry. Each idea should be highly specific, technically accurate, and provide genuine value to the drone community.
+        
+        prompt = f"""Generate {num_ideas} unique and creative content ideas for the drone industry. Each idea should be highly specific, technically accurate, and provide genuine value to the drone community.
 
 Return ONLY a valid JSON array in this exact format:
 [
@@ -310,157 +901,159 @@ Return ONLY a valid JSON array in this exact format:
 ]
 
 Make each idea unique, technically rich, and avoid generic statements. Focus on current trends, emerging technologies, and practical applications."""
-            
-            response = backend.generate_content(prompt, system_prompt)
-            ideas = self._parse_ideas_response(response)
-            
-            if not ideas:
-                self.logger.warning(f"No valid ideas parsed from {model_name}, using fallback")
-                return self._generate_fallback_ideas(num_ideas)
-            
-            # Process and enhance ideas
-            processed_ideas = self._process_and_enhance_ideas(ideas)
-            
-            return {
-                'ideas': processed_ideas,
-                'total_ideas': len(processed_ideas),
-                'model_used': model_name,
-                'generated_at': datetime.now().isoformat(),
-                'categories': list(set(idea.get('category', 'General') for idea in processed_ideas)),
-                'has_technical_content': True
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Error generating ideas with {model_name}: {str(e)}")
-            return self._generate_fallback_ideas(num_ideas)
+        
+        return prompt, system_prompt
+    
+    def _build_ideas_result(self, response: str, model_name: str, num_ideas: int,
+                            generated_at: Optional[str] = None) -> Dict[str, Any]:
+        """Turn a raw model response into the ideas result payload"""
+        ideas = self._parse_ideas_response(response)
+        
+        if not ideas:
+            self.logger.warning(f"No valid ideas parsed from {model_name}, using fallback")
+            return self._generate_fallback_ideas(num_ideas, generated_at)
+        
+        # Process and enhance ideas
+        processed_ideas = self._process_and_enhance_ideas(ideas)
+        
+        return {
+            'ideas': processed_ideas,
+            'total_ideas': len(processed_ideas),
+            'model_used': model_name,
+            'generated_at': generated_at or _utc_timestamp(),
+            'categories': list(set(idea.get('category', 'General') for idea in processed_ideas)),
+            'has_technical_content': True
+        }
     
     def _parse_ideas_response(self, response: str) -> List[Dict[str, Any]]:
         """Parse AI response into structured ideas"""
         try:
-            # Clean response to extract JSON
-            cleaned_response = self._extract_json_from_response(response)
-            ideas = json.loads(cleaned_response)
+            # Locate and decode the JSON payload
+            ideas = self._extract_json_from_response(response)
+            
+            if ideas is None:
+                self.logger.error("No JSON found in response")
+                return []
             
             if not isinstance(ideas, list):
                 self.logger.error("Response is not a list")
                 return []
             
-            valid_ideas = []
-            for idea in ideas:
-                if isinstance(idea, dict) and 'title' in idea and 'description' in idea:
-                    # Ensure required fields exist
-                    processed_idea = {
-                        'title': str(idea.get('title', ''))[:self.config.max_title_length],
-                        'description': str(idea.get('description', ''))[:self.config.max_description_length],
-                        'category': idea.get('category', 'General'),
-                        'complexity': idea.get('complexity', 'Intermediate'),
-                        'keywords': idea.get('keywords', [])
-                    }
-                    
-                    # Check uniqueness
-                    if self.deduplicator.is_content_unique(processed_idea['title']):
-                        self.deduplicator.add_used_content(processed_idea['title'], 'topic')
-                        valid_ideas.append(processed_idea)
+            candidates = [candidate for candidate in map(self._normalize_idea, ideas) if candidate is not None]
             
-            return valid_ideas
+            # Check uniqueness for the whole batch at once
+            unique_indices = self.deduplicator.filter_unique_titles([idea['title'] for idea in candidates])
+            return [candidates[index] for index in unique_indices]
             
-        except json.JSONDecodeError as e:
-            self.logger.error(f"JSON parsing error: {str(e)}")
-            return []
         except Exception as e:
             self.logger.error(f"Error parsing ideas response: {str(e)}")
             return []
     
-    def _extract_json_from_response(self, response: str) -> str:
-        """Extract JSON array from AI response"""
-        # Try to find JSON array in response
-        json_patterns = [
-            r'\[[\s\S]*\]',  # Match array
-            r'\{[\s\S]*\}',  # Match object
-        ]
+    def _normalize_idea(self, idea: Any) -> Optional[Dict[str, Any]]:
+        """Coerce a decoded idea into the expected fields, or None if it lacks a title/description"""
+        if not (isinstance(idea, dict) and 'title' in idea and 'description' in idea):
+            return None
         
-        for pattern in json_patterns:
-            matches = re.findall(pattern, response)
-            if matches:
-                return matches[0]
-        
-        # If no JSON found, return the response as-is
-        return response.strip()
+        # Ensure required fields exist
+        return {
+            'title': str(idea.get('title', ''))[:self.config.max_title_length],
+            'description': str(idea.get('description', ''))[:self.config.max_description_length],
+            'category': idea.get('category', 'General'),
+            'complexity': idea.get('complexity', 'Intermediate'),
+            'keywords': idea.get('keywords', [])
+        }
+    
+    def _extract_json_from_response(self, response: str) -> Any:
+        """Decode the first JSON array (or, failing that, object) embedded in an AI response"""
+        # Decode straight from each candidate bracket instead of regex-matching
+        # the span first and parsing it a second time
+        for opener in '[{':
+            start = response.find(opener)
+            while start != -1:
+                try:
+                    return _JSON_DECODER.raw_decode(response, start)[0]
+                except json.JSONDecodeError:
+                    start = response.find(opener, start + 1)
+        
+        # No JSON found
+        return None
     
     def _process_and_enhance_ideas(self, ideas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Process and enhance ideas with additional metadata"""
         enhanced_ideas = []
         
         for idea in ideas:
-            # Generate hashtags based on keywords and content
-            hashtags = self._generate_hashtags(idea)
+            # Coerce to strings so odd model output (lists, dicts) stays hashable for the cache
+            complexity = idea.get('complexity')
+            hashtags, engagement, pillars, audiences = self._classify_idea(
+                str(idea.get('title', '')),
+                str(idea.get('description', '')),
+                str(idea.get('category', 'General')),
+                None if complexity is None else str(complexity),
+                tuple(str(keyword) for keyword in idea.get('keywords', [])[:3])
+            )
             
             # Add metadata
             enhanced_idea = {
                 **idea,
-                'hashtags': hashtags,
-                'estimated_engagement': self._estimate_engagement_potential(idea),
-                'content_pillars': self._identify_content_pillars(idea),
-                'target_audience': self._identify_target_audience(idea)
+                'hashtags': list(hashtags),
+                'estimated_engagement': engagement,
+                'content_pillars': list(pillars),
+                'target_audience': list(audiences)
             }
             
             enhanced_ideas.append(enhanced_idea)
         
         return enhanced_ideas
     
-    def _generate_hashtags(self, idea: Dict[str, Any]) -> List[str]:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _classify_idea(title: str, description: str, category: str, complexity: Optional[str],
+                       keywords: Tuple[str, ...]) -> Tuple[Tuple[str, ...], str, Tuple[str, ...], Tuple[str, ...]]:
+        """Derive hashtags, engagement potential, content pillars and audience for an idea"""
+        content = f"{title} {description}".lower()
+        
+        # One substring check per distinct keyword; the pillar/audience/trending
+        # buckets are then resolved with set operations on the matches
+        matched = {keyword for keyword in _CLASSIFIER_KEYWORDS if keyword in content}
+        
+        hashtags = ContentIdeator._generate_hashtags(category, keywords)
+        engagement = ContentIdeator._estimate_engagement_potential(matched, category, complexity)
+        pillars = tuple(pillar for pillar, words in _PILLAR_KEYWORDS.items() if not matched.isdisjoint(words))
+        audiences = ContentIdeator._identify_target_audience(matched, complexity)
+        
+        return hashtags, engagement, pillars or ('General',), audiences
+    
+    @staticmethod
+    def _generate_hashtags(category: str, keywords: Tuple[str, ...]) -> Tuple[str, ...]:
         """Generate relevant hashtags for an idea"""
-        base_hashtags = ['#drone', '#drones', '#UAV', '#droneindustry']
+        # Insertion-ordered dict keys act as an ordered set
+        hashtags = dict.fromkeys(_BASE_HASHTAGS)
         
         # Category-specific hashtags
-        category_hashtags = {
-            'Technology': ['#dronetech', '#innovation', '#technology'],
-            'Business': ['#dronebusiness', '#commercialdrones', '#dronesolutions'],
-            'Regulations': ['#droneregulations', '#FAA', '#dronesafety'],
-            'Applications': ['#droneapplications', '#droneuse', '#dronesolutions'],
-            'Education': ['#droneeducation', '#dronetraining', '#learntofly'],
-            'Market Analysis': ['#dronemarket', '#droneinvestment', '#dronetrends']
-        }
-        
-        hashtags = base_hashtags.copy()
-        category = idea.get('category', 'General')
-        if category in category_hashtags:
-            hashtags.extend(category_hashtags[category])
+        if category in _CATEGORY_HASHTAGS:
+            hashtags.update(dict.fromkeys(_CATEGORY_HASHTAGS[category]))
         
         # Add keyword-based hashtags
-        keywords = idea.get('keywords', [])
         for keyword in keywords[:3]:  # Limit to 3 keyword hashtags
-            hashtag = f"#{keyword.lower().replace(' ', '').replace('-', '')}"
-            if hashtag not in hashtags:
-                hashtags.append(hashtag)
+            hashtags.setdefault(f"#{keyword.lower().translate(_HASHTAG_STRIP)}", None)
         
-        return hashtags[:8]  # Limit total hashtags
+        return tuple(hashtags)[:8]  # Limit total hashtags
     
-    def _estimate_engagement_potential(self, idea: Dict[str, Any]) -> str:
+    @staticmethod
+    def _estimate_engagement_potential(matched: set, category: str, complexity: Optional[str]) -> str:
         """Estimate engagement potential based on content characteristics"""
-        score = 0
-        
         # Check for trending keywords
-        trending_keywords = [
-            'AI', 'autonomous', 'delivery', 'inspection', 'mapping', 
-            'agriculture', 'surveillance', 'racing', 'FPV', '4K', '8K'
-        ]
-        
-        content = f"{idea.get('title', '')} {idea.get('description', '')}".lower()
-        
-        for keyword in trending_keywords:
-            if keyword.lower() in content:
-                score += 1
+        score = len(matched.intersection(_TRENDING_KEYWORDS))
         
         # Complexity bonus
-        if idea.get('complexity') == 'Advanced':
+        if complexity == 'Advanced':
             score += 2
-        elif idea.get('complexity') == 'Intermediate':
+        elif complexity == 'Intermediate':
             score += 1
         
         # Category bonus
-        high_engagement_categories = ['Technology', 'Applications']
-        if idea.get('category') in high_engagement_categories:
+        if category in _HIGH_ENGAGEMENT_CATEGORIES:
             score += 1
         
         if score >= 4:
@@ -470,44 +1063,13 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
         else:
             return "Low"
     
-    def _identify_content_pillars(self, idea: Dict[str, Any]) -> List[str]:
-        """Identify content pillars for the idea"""
-        pillars = []
-        
-        content = f"{idea.get('title', '')} {idea.get('description', '')}".lower()
-        
-        pillar_keywords = {
-            'Education': ['tutorial', 'guide', 'learn', 'how to', 'beginner', 'training'],
-            'Innovation': ['new', 'latest', 'breakthrough', 'cutting-edge', 'advanced', 'future'],
-            'Business': ['roi', 'profit', 'business', 'commercial', 'investment', 'market'],
-            'Safety': ['safety', 'regulation', 'compliance', 'legal', 'risk', 'secure'],
-            'Entertainment': ['racing', 'fpv', 'photography', 'videography', 'fun', 'hobby']
-        }
-        
-        for pillar, keywords in pillar_keywords.items():
-            if any(keyword in content for keyword in keywords):
-                pillars.append(pillar)
-        
-        return pillars if pillars else ['General']
-    
-    def _identify_target_audience(self, idea: Dict[str, Any]) -> List[str]:
+    @staticmethod
+    def _identify_target_audience(matched: set, complexity: Optional[str]) -> Tuple[str, ...]:
         """Identify target audience for the idea"""
-        audiences = []
-        
-        content = f"{idea.get('title', '')} {idea.get('description', '')}".lower()
-        complexity = idea.get('complexity', 'Intermediate')
-        
-        audience_indicators = {
-            'Professionals': ['commercial', 'business', 'professional', 'enterprise', 'industry'],
-            'Hobbyists': ['hobby', 'fun', 'recreational', 'personal', 'diy'],
-            'Developers': ['software', 'programming', 'code', 'development', 'API'],
-            'Pilots': ['pilot', 'flying', 'flight', 'control', 'navigation'],
-            'Beginners': ['beginner', 'start', 'introduction', 'basic', 'first time']
-        }
-        
-        for audience, keywords in audience_indicators.items():
-            if any(keyword in content for keyword in keywords):
-                audiences.append(audience)
+        audiences = [
+            audience for audience, words in _AUDIENCE_INDICATORS.items()
+            if not matched.isdisjoint(words)
+        ]
         
         # Add based on complexity
         if complexity == 'Beginner' and 'Beginners' not in audiences:
@@ -515,62 +1077,31 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
         elif complexity == 'Advanced' and 'Professionals' not in audiences:
             audiences.append('Professionals')
         
-        return audiences if audiences else ['General Audience']
+        return tuple(audiences) if audiences else ('General Audience',)
     
-    def _generate_fallback_ideas(self, num_ideas: int) -> Dict[str, Any]:
+    def _generate_fallback_ideas(self, num_ideas: int, generated_at: Optional[str] = None) -> Dict[str, Any]:
         """Generate fallback ideas when AI fails"""
-        fallback_templates = [
-            {
-                "title": "Advanced Drone Mapping Techniques for {industry}",
-                "description": "Explore cutting-edge photogrammetry and LiDAR integration for precision {application} with sub-centimeter accuracy and automated workflow optimization.",
-                "category": "Technology",
-                "industries": ["Construction", "Agriculture", "Mining", "Infrastructure"],
-                "applications": ["surveying", "monitoring", "inspection", "analysis"]
-            },
-            {
-                "title": "ROI Analysis: Commercial Drone Deployment in {sector}",
-                "description": "Comprehensive cost-benefit analysis of drone implementation for {use_case}, including equipment costs, training investment, and projected savings.",
-                "category": "Business",
-                "sectors": ["Real Estate", "Insurance", "Security", "Logistics"],
-                "use_cases": ["property assessment", "claims processing", "perimeter monitoring", "inventory management"]
-            },
-            {
-                "title": "Regulatory Update: {regulation} Impact on Drone Operations",
-                "description": "Latest {regulation} requirements for commercial drone pilots, including compliance strategies and operational adaptations for continued legal flight operations.",
-                "category": "Regulations",
-                "regulations": ["Part 107", "Remote ID", "BVLOS", "Urban Air Mobility"]
-            },
-            {
-                "title": "Technical Deep-dive: {technology} in Modern Drones",
-                "description": "Engineering analysis of {technology} implementation, performance characteristics, and practical applications in professional drone operations.",
-                "category": "Technology",
-                "technologies": ["AI-powered obstacle avoidance", "Swarm intelligence", "Edge computing", "Advanced sensor fusion"]
-            }
-        ]
+        # Draw all random picks up front with one call per slot
+        templates = random.choices(_FALLBACK_IDEA_TEMPLATES, k=num_ideas)
+        complexities = random.choices(("Intermediate", "Advanced"), k=num_ideas)
+        picks = {
+            key: random.choices(options, k=num_ideas)
+            for template in _FALLBACK_IDEA_TEMPLATES
+            for key, options in template["values"].items()
+        }
         
         ideas = []
-        for i in range(num_ideas):
-            template = random.choice(fallback_templates)
-            
-            # Fill template with random choices
-            title = template["title"]
-            description = template["description"]
-            
-            for key, values in template.items():
-                if key in ["title", "description", "category"]:
-                    continue
-                
-                placeholder = f"{{{key[:-1]}}}"  # Remove 's' from plural keys
-                if placeholder in title:
-                    title = title.replace(placeholder, random.choice(values))
-                if placeholder in description:
-                    description = description.replace(placeholder, random.choice(values))
+        for i, template in enumerate(templates):
+            # Fill every placeholder once so title and description agree
+            values = {key: picks[key][i] for key in template["values"]}
+            title = template["title"].format(**values)
+            description = template["description"].format(**values)
             
             idea = {
                 "title": title,
                 "description": description,
                 "category": template["category"],
-                "complexity": random.choice(["Intermediate", "Advanced"]),
+                "complexity": complexities[i],
                 "keywords": self._extract_keywords_from_text(f"{title} {description}")
             }
             
@@ -582,22 +1113,15 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             'ideas': processed_ideas,
             'total_ideas': len(processed_ideas),
             'model_used': 'Fallback Generator',
-            'generated_at': datetime.now().isoformat(),
+            'generated_at': generated_at or _utc_timestamp(),
             'categories': list(set(idea.get('category', 'General') for idea in processed_ideas)),
             'has_technical_content': True
         }
     
     def _extract_keywords_from_text(self, text: str) -> List[str]:
         """Extract keywords from text for fallback ideas"""
-        drone_keywords = [
-            'mapping', 'surveying', 'inspection', 'photography', 'videography',
-            'agriculture', 'construction', 'security', 'delivery', 'racing',
-            'FPV', 'autonomous', 'AI', 'sensors', 'gimbal', 'battery',
-            'regulations', 'Part107', 'commercial', 'professional'
-        ]
-        
         text_lower = text.lower()
-        found_keywords = [kw for kw in drone_keywords if kw.lower() in text_lower]
+        found_keywords = [kw for kw, kw_lower in _DRONE_KEYWORDS if kw_lower in text_lower]
         
         return found_keywords[:5] if found_keywords else ['drone', 'UAV', 'technology']
             
@@ -609,6 +1133,12 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
         prompt = self._create_thread_prompt(theme, tweet_count)
         
         try:
+            # Reuse a thread generated for an equivalent theme
+            if self._response_cache is not None:
+                cached = self._find_similar_thread(theme, tweet_count)
+                if cached is not None:
+                    return cached
+            
             # Get AI-generated content
             if self.perplexity_key:
                 raw_content = self._query_perplexity(prompt)
@@ -619,13 +1149,65 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             # Post-process to ensure quality
             thread_data = self._improve_thread_quality(thread_data)
             
+            if self._response_cache is not None and thread_data.get('ai_generated') and thread_data['tweets']:
+                self._thread_cache[(self._theme_terms(theme), tweet_count)] = copy.deepcopy(thread_data)
+                while len(self._thread_cache) > _THREAD_CACHE_SIZE:
+                    self._thread_cache.popitem(last=False)
+            
             return thread_data
             
         except Exception as e:
             logger.error(f"Error generating thread: {e}")
             return self._generate_fallback_thread(theme, tweet_count)
     
-    def _create_thread_prompt(self, theme: str, tweet_count: int) -> str:
+    def generate_threads_batch(self, themes: List[str], tweet_count: int = 10,
+                               model_name: str = "Gemini Flash") -> Dict[str, Dict]:
+        """Generate threads for known themes in one Gemini Batch API job (for scheduled, non-interactive runs)"""
+        logger.info(f"Submitting batch of {len(themes)} threads to {model_name}")
+        
+        raw_contents = {}
+        try:
+            backend = self._get_backend(model_name)
+            prompts = {theme: self._create_thread_prompt(theme, tweet_count) for theme in themes}
+            raw_contents = backend.generate_content_batch(prompts, _THREAD_SYSTEM_PROMPT)
+        except Exception as e:
+            logger.error(f"Error generating thread batch: {e}")
+        
+        threads = {}
+        for theme in themes:
+            raw_content = raw_contents.get(theme)
+            if raw_content is None:
+                # Failed or missing entries fall back to the regular per-theme path
+                threads[theme] = self.generate_thread_content(theme, tweet_count)
+                continue
+            thread_data = self._parse_thread_response(raw_content, theme)
+            threads[theme] = self._improve_thread_quality(thread_data)
+        
+        return threads
+    
+    def _find_similar_thread(self, theme: str, tweet_count: int) -> Optional[Dict]:
+        """Return a copy of a cached thread whose theme has exactly the same terms as this one"""
+        # Only identical term sets match: one differing word ("beginners" vs
+        # "professionals") can change what the thread should say
+        key = (self._theme_terms(theme), tweet_count)
+        if not key[0] or key not in self._thread_cache:
+            return None
+        
+        self._thread_cache.move_to_end(key)
+        thread_data = copy.deepcopy(self._thread_cache[key])
+        logger.info(f"Reusing cached thread for equivalent theme: {thread_data['theme']}")
+        thread_data['theme'] = theme
+        thread_data['generated_at'] = _utc_timestamp()
+        return thread_data
+    
+    @staticmethod
+    def _theme_terms(theme: str) -> frozenset:
+        """Lowercased theme words without punctuation or stop words"""
+        return frozenset(_PUNCT_RE.sub(' ', theme.lower()).split()) - _STOP_WORDS
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _create_thread_prompt(theme: str, tweet_count: int) -> str:
         """Create a focused prompt for generating coherent thread content"""
         
         return f"""
@@ -670,13 +1252,9 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
     def _query_perplexity(self, prompt: str) -> str:
         """Query Perplexity API using the working pattern"""
         url = "https://api.perplexity.ai/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {self.perplexity_key}",
-            "Content-Type": "application/json"
-        }
         
         # Combine system and user prompts for better results
-        full_prompt = f"""You are an expert drone engineer, have profound knowledge in unmanned aerial systems, PHD in aerospace engineering, have skills of FPV flying, drone building, IOT+Drone systems, cinematography and content creation. Create engaging, educational Twitter threads with unique insights and zero repetition.
+        full_prompt = f"""{_THREAD_SYSTEM_PROMPT}
 
 {prompt}"""
         
@@ -686,16 +1264,30 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             "max_tokens": 2000  # Increased for longer thread content
         }
         
+        # Identical thread prompts are served from the response cache when enabled
+        cache_key = None
+        if self._response_cache is not None:
+            cache_key = ResponseCache.make_key("PerplexityThread", data["model"], data["max_tokens"], full_prompt)
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Using cached Perplexity thread response")
+                return cached
+        
         try:
             # Log the API request (without showing the full key)
             masked_key = self.perplexity_key[:8] + "..." if self.perplexity_key and len(self.perplexity_key) > 10 else "[None]"
             logger.info(f"Calling Perplexity API with key: {masked_key}")
             
-            response = requests.post(url, json=data, headers=headers, timeout=45)
+            # Fail fast if the host is unreachable; generation itself may take a while
+            response = _SESSION.post(url, data=json_utils.dumps(data), headers=self._perplexity_headers,
+                                     timeout=(5, 45))
             
             if response.status_code == 200:
-                result = response.json()
-                return result['choices'][0]['message']['content']
+                result = json_utils.loads(response.content)
+                content = result['choices'][0]['message']['content']
+                if cache_key is not None:
+                    self._response_cache.set(cache_key, content)
+                return content
             else:
                 logger.error(f"Perplexity API error: Status {response.status_code}")
                 return f"Error: {response.status_code}"
@@ -713,49 +1305,35 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
     def _parse_thread_response(self, raw_content: str, theme: str) -> Dict:
         """Parse AI response into structured thread data"""
         tweets = []
-        lines = raw_content.strip().split('\n')
-        
-        current_tweet = ""
+        # Collect tweet lines and join once per tweet instead of concatenating
+        current_parts = []
         tweet_number = 0
         
-        for line in lines:
-            line = line.strip()
+        # Read lines lazily rather than materializing a list of them; blank
+        # lines are skipped, as they never start or extend a tweet
+        for line_match in _NON_EMPTY_LINE_RE.finditer(raw_content):
+            line = line_match.group().strip()
             
-            # Look for tweet markers
-            if line.startswith(('Tweet ', 'tweet ', f'{tweet_number + 1}:', f'Tweet {tweet_number + 1}:')):
+            # Look for tweet markers; numbered markers must continue the sequence
+            marker = _TWEET_MARKER_RE.match(line)
+            if marker and (marker.group(2) is None or int(marker.group(2)) == tweet_number + 1):
                 # Save previous tweet if exists
-                if current_tweet and tweet_number > 0:
-                    tweets.append({
-                        'number': tweet_number,
-                        'content': current_tweet.strip(),
-                        'character_count': len(current_tweet.strip()),
-                        'needs_image': self._should_include_image(current_tweet, tweet_number)
-                    })
+                if current_parts and tweet_number > 0:
+                    tweets.append(self._build_parsed_tweet(current_parts, tweet_number))
                 
                 # Start new tweet
                 tweet_number += 1
                 # Extract content after the tweet marker
-                content_start = line.find(':')
-                if content_start != -1:
-                    current_tweet = line[content_start + 1:].strip()
-                else:
-                    current_tweet = ""
+                marker_content = (marker.group(1) or marker.group(3) or "").strip()
+                current_parts = [marker_content] if marker_content else []
                     
             elif line and not line.startswith('#') and tweet_number > 0:
                 # Continue current tweet content
-                if current_tweet:
-                    current_tweet += " " + line
-                else:
-                    current_tweet = line
+                current_parts.append(line)
         
         # Don't forget the last tweet
-        if current_tweet and tweet_number > 0:
-            tweets.append({
-                'number': tweet_number,
-                'content': current_tweet.strip(),
-                'character_count': len(current_tweet.strip()),
-                'needs_image': self._should_include_image(current_tweet, tweet_number)
-            })
+        if current_parts and tweet_number > 0:
+            tweets.append(self._build_parsed_tweet(current_parts, tweet_number))
         
         # Ensure we have the right number of tweets
         if len(tweets) == 0:
@@ -766,19 +1344,28 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             'theme': theme,
             'tweets': tweets,
             'total_tweets': len(tweets),
-            'generated_at': datetime.now().isoformat(),
+            'generated_at': _utc_timestamp(),
             'ai_generated': True
         }
     
+    def _build_parsed_tweet(self, parts: List[str], tweet_number: int) -> Dict:
+        """Join collected tweet lines into a tweet entry"""
+        content = ' '.join(parts)
+        return {
+            'number': tweet_number,
+            'content': content,
+            'character_count': len(content),
+            'needs_image': self._should_include_image(content, tweet_number)
+        }
+    
     def _fallback_parse(self, content: str) -> List[Dict]:
         """Fallback parsing when structured parsing fails"""
         # Split content into roughly tweet-sized chunks
-        sentences = content.replace('\n', ' ').split('. ')
         tweets = []
         current_tweet = ""
         tweet_number = 1
         
-        for sentence in sentences:
+        for sentence in _iter_sentences(content):
             sentence = sentence.strip()
             if not sentence:
                 continue
@@ -791,128 +1378,100 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             else:
                 # Save current tweet and start new one
                 if current_tweet:
-                    tweets.append({
-                        'number': tweet_number,
-                        'content': current_tweet.strip() + ("." if not current_tweet.endswith('.') else ""),
-                        'character_count': len(current_tweet.strip()),
-                        'needs_image': tweet_number % 3 == 1  # Every 3rd tweet gets an image
-                    })
+                    tweets.append(self._build_fallback_tweet(current_tweet, tweet_number))
+                    if len(tweets) == _MAX_FALLBACK_TWEETS:
+                        return tweets
                     tweet_number += 1
                     current_tweet = sentence
         
         # Add the last tweet
         if current_tweet:
-            tweets.append({
-                'number': tweet_number,
-                'content': current_tweet.strip() + ("." if not current_tweet.endswith('.') else ""),
-                'character_count': len(current_tweet.strip()),
-                'needs_image': tweet_number % 3 == 1
-            })
+            tweets.append(self._build_fallback_tweet(current_tweet, tweet_number))
         
-        return tweets[:10]  # Limit to 10 tweets
+        return tweets
+    
+    @staticmethod
+    def _build_fallback_tweet(text: str, tweet_number: int) -> Dict:
+        """Build a tweet entry from joined sentences, ensuring it ends with a period"""
+        # Sentences are stripped before joining, so text has no outer whitespace
+        content = text if text.endswith('.') else text + '.'
+        return {
+            'number': tweet_number,
+            'content': content,
+            'character_count': len(content),
+            'needs_image': tweet_number % 3 == 1  # Every 3rd tweet gets an image
+        }
     
-    def _should_include_image(self, content: str, tweet_number: int) -> bool:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _should_include_image(content: str, tweet_number: int) -> bool:
         """Determine if a tweet should include an image"""
         # Include images for:
         # - First tweet (hook)
         # - Every 3rd tweet
         # - Tweets with specific keywords
-        image_keywords = ['technique', 'tip', 'example', 'show', 'look', 'see', 'visual', 'photo', 'shot']
-        
         return (
             tweet_number == 1 or 
             tweet_number % 3 == 0 or
-            any(keyword in content.lower() for keyword in image_keywords)
+            _IMAGE_KEYWORD_RE.search(content) is not None
         )
     
     def _improve_thread_quality(self, thread_data: Dict) -> Dict:
         """Post-process thread to improve quality and remove repetition"""
-        tweets = thread_data.get('tweets', [])
-        improved_tweets = []
-        
-        for tweet in tweets:
-            content = tweet['content']
-            
-            # Remove common repetitive phrases
-            repetitive_phrases = [
-                "Includes premium carrying case for safe transport",
-                "Volume discounts available for businesses",
-                "Industry-leading warranty covers all components",
-                "Limited production run selling out fast",
-                "Free training session with every purchase",
-                "Compatible with all standard mounting equipment"
-            ]
-            
-            # Remove repetitive content
-            for phrase in repetitive_phrases:
-                content = content.replace(phrase, "").strip()
-            
-            # Clean up extra spaces and punctuation
-            content = ' '.join(content.split())  # Remove extra whitespace
-            content = content.rstrip('.') + '.'  # Ensure proper ending
-            
-            # Update character count
-            tweet['content'] = content
-            tweet['character_count'] = len(content)
-            
-            # Only keep tweets with substantial content
-            if len(content) > 50:
-                improved_tweets.append(tweet)
+        # Only keep tweets with substantial content
+        improved_tweets = [
+            tweet for tweet in map(self._clean_tweet, thread_data.get('tweets', []))
+            if tweet['character_count'] > 50
+        ]
         
         thread_data['tweets'] = improved_tweets
         thread_data['total_tweets'] = len(improved_tweets)
         
         return thread_data
     
+    @staticmethod
+    def _clean_tweet(tweet: Dict) -> Dict:
+        """Strip repetitive phrases and normalize whitespace and ending in place"""
+        # Remove common repetitive phrases in a single pass
+        content = _REPETITIVE_RE.sub("", tweet['content'])
+        
+        # Clean up extra spaces and punctuation
+        content = ' '.join(content.split())  # Remove extra whitespace (also strips the ends)
+        if not content.endswith('.') or content.endswith('..'):
+            content = content.rstrip('.') + '.'  # Ensure proper ending
+        
+        # Update character count
+        tweet['content'] = content
+        tweet['character_count'] = len(content)
+        return tweet
+    
     def _generate_fallback_thread(self, theme: str, tweet_count: int) -> Dict:
         """Generate high-quality fallback thread when AI fails"""
-        
-        # Theme-specific expert content
-        expert_threads = {
-            "The Art of Drone Cinematography: Pro Tips": [
-                "🎬 Drone cinematography has evolved from novelty to necessity. What once required $100k helicopter rentals now fits in your backpack. Here's what separates amateur footage from cinematic gold...",
-                
-                "First rule: Motion tells the story. Static hovering shots scream 'amateur.' Professional pilots use reveal shots - starting close, pulling back to show scale and context.",
-                
-                "Camera settings matter more than your drone. Shoot in D-Log or flat profiles, 24fps for cinematic feel, 1/48 shutter speed. Always shoot in 4K even if delivering 1080p.",
-                
-                "Master the 'invisible' movements: slow accelerations, gentle curves, purposeful height changes. Jerky movements break immersion instantly.",
-                
-                "Lighting is everything. Golden hour isn't just prettier - it's forgiving. Harsh midday sun creates unflattering shadows and blown highlights.",
-                
-                "Pre-plan your shots with apps like Litchi or DroneDeploy. Knowing your flight path saves battery and ensures smooth, repeatable movements.",
-                
-                "Sound design matters too. Drone footage needs audio - wind, environment, music. The propeller buzz should never make it to your final edit.",
-                
-                "Learn these essential shots: dolly zoom, orbital, dronie, tilt reveal, top-down pattern shots. Each serves a specific storytelling purpose.",
-                
-                "Post-production is where magic happens. Color grading flat profiles, stabilization in post, speed ramping for dramatic effect.",
-                
-                "Ready to master aerial storytelling? 🚁\n🔗 Full cinematic guide: https://cryomech01.gumroad.com\n📧 Get pro techniques + presets\n🐦 Follow for daily tips\n\nDrop a 🎬 if you're ready!"
-            ]
-        }
-        
         # Get expert content or generate generic
-        if theme in expert_threads:
-            tweet_contents = expert_threads[theme]
-        else:
+        tweet_contents = _EXPERT_THREADS.get(theme)
+        if tweet_contents is None:
             tweet_contents = self._generate_generic_thread(theme, tweet_count)
         
+        # Decide image placement up front: the hook and every 3rd tweet
+        tweet_contents = tweet_contents[:tweet_count]
+        needs_image = [i == 1 or i % 3 == 0 for i in range(1, len(tweet_contents) + 1)]
+        
         # Structure the response
-        tweets = []
-        for i, content in enumerate(tweet_contents[:tweet_count], 1):
-            tweets.append({
+        tweets = [
+            {
                 'number': i,
                 'content': content,
                 'character_count': len(content),
-                'needs_image': i == 1 or i % 3 == 0
-            })
+                'needs_image': with_image
+            }
+            for i, (content, with_image) in enumerate(zip(tweet_contents, needs_image), 1)
+        ]
         
         return {
             'theme': theme,
             'tweets': tweets,
             'total_tweets': len(tweets),
-            'generated_at': datetime.now().isoformat(),
+            'generated_at': _utc_timestamp(),
             'ai_generated': False
         }
     
@@ -938,12 +1497,16 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
     
     def set_generation_preferences(self, preferences: Dict[str, Any]) -> None:
         """Set user preferences for content generation"""
+        updates = {}
         if 'categories' in preferences:
-            self.config.preferred_categories = preferences['categories']
+            updates['preferred_categories'] = tuple(preferences['categories'])
         if 'complexity' in preferences:
-            self.config.preferred_complexity = preferences['complexity']
+            updates['preferred_complexity'] = preferences['complexity']
         if 'max_ideas' in preferences:
-            self.config.max_ideas_per_request = preferences['max_ideas']
+            updates['max_ideas_per_request'] = preferences['max_ideas']
+        
+        # ContentConfig is frozen (and may be the shared default), so swap in a copy
+        self.config = replace(self.config, **updates)
         
         self.logger.info(f"Updated generation preferences: {preferences}")
     
@@ -971,9 +1534,7 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             score += 1
         
         # Check for drone relevance
-        content = f"{title} {description}".lower()
-        drone_terms = ['drone', 'uav', 'quadcopter', 'multirotor', 'aerial', 'flight', 'aviation']
-        if any(term in content for term in drone_terms):
+        if _DRONE_TERMS_RE.search(title) or _DRONE_TERMS_RE.search(description):
             score += 1
         else:
             issues.append("Low drone relevance")
@@ -991,6 +1552,10 @@ Make each idea unique, technically rich, and avoid generic statements. Focus on
             'issues': issues,
             'passed': score >= 2
         }
+    
+    def validate_ideas_quality(self, ideas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Validate and score a batch of ideas, in order"""
+        return [self.validate_idea_quality(idea) for idea in ideas]
 
 # Usage example:
 # ideator = ContentIdeator()
@@ -3,20 +3,22 @@ Post Scheduler Module
 Handles timing and scheduling of Twitter posts for optimal engagement
 """
 
+import bisect
+import queue
 import schedule
 import time
-import pytz
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import cached_property, lru_cache
+from typing import List, Dict, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import threading
-import json
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.logger import setup_logger
 from utils.config import load_config
-from utils.config import load_config
+from utils import json_utils
 
 from .ideator import ContentIdeator
 from .writer import ThreadWriter
@@ -25,37 +27,135 @@ from utils.poster import TwitterPoster
 
 logger = setup_logger(__name__)
 
+# Posting history shared with the CLI (main.py)
+HISTORY_PATH = 'data/history.json'
+
+# Reference timezone for posting-time analysis; the others are looked up with _zone()
+_TZ_UTC = timezone.utc
+
+# Peak engagement hours (based on global Twitter usage); other hours score 50
+_PEAK_ENGAGEMENT_HOURS = {
+    6: 70,   # 10am IST = 6am-12am EST (good for US morning)
+    7: 75,
+    8: 80,
+    9: 85,
+    13: 90,  # 7pm IST = 1:30pm UTC (good for EU afternoon + US morning)
+    14: 85,
+    15: 80,
+    16: 75
+}
+_ENGAGEMENT_BY_HOUR = tuple(_PEAK_ENGAGEMENT_HOURS.get(hour, 50) for hour in range(24))
+
+
+@lru_cache(maxsize=None)
+def _zone(name: str) -> tzinfo:
+    """Timezone for an IANA name, or UTC when the tz database isn't available (e.g. Windows without tzdata)"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        logger.warning(f"Timezone {name} unavailable ({e}), using UTC; install tzdata")
+        return _TZ_UTC
+
+
+def _audience_for_utc_hour(utc_hour: int) -> str:
+    """Primary target audience for a UTC posting hour"""
+    if 12 <= utc_hour <= 16:
+        return "US Morning + EU Afternoon"
+    elif 4 <= utc_hour <= 8:
+        return "US Evening + Asia Morning"
+    elif 20 <= utc_hour <= 23:
+        return "EU Evening + US Afternoon"
+    else:
+        return "Global Mixed"
+
+
+def _parse_hm(post_time: str) -> Tuple[int, int]:
+    """Parse an "HH:MM" post time, raising ValueError for anything else"""
+    hour, minute = map(int, str(post_time).split(':'))
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"{post_time!r} is not a valid HH:MM time")
+    return hour, minute
+
+
+def _format_hm(moment: datetime) -> str:
+    """Format a time as HH:MM without going through strftime"""
+    return f"{moment.hour:02d}:{moment.minute:02d}"
+
+
+# Precomputed so lookups skip the comparison chain
+_AUDIENCE_BY_UTC_HOUR = tuple(_audience_for_utc_hour(hour) for hour in range(24))
+
+# Posting consistency by average hours between posts: <=15, <=24, <=48, more
+_CONSISTENCY_THRESHOLDS = (15, 24, 48)
+_CONSISTENCY_LABELS = ("Very Consistent", "Consistent", "Moderate", "Inconsistent")
+
 class PostScheduler:
     def __init__(self):
-        self.timezone = pytz.timezone('Asia/Kolkata')  # IST timezone
+        self.timezone = _zone('Asia/Kolkata')  # IST timezone
         self.post_times = ['10:00', '19:00']  # 10am and 7pm IST
         self.is_running = False
         self.scheduler_thread = None
+        self.worker_thread = None
+        # Set to wake the scheduler loop early (schedule changed or stop requested)
+        self._wakeup = threading.Event()
+        # Stop signal for the current scheduler thread (replaced on each start)
+        self._stop_event = threading.Event()
+        # Due jobs, run by the worker thread so slow posts never stall the schedule loop
+        self._job_queue = queue.Queue()
         
-        # Initialize components
-        self.ideator = ContentIdeator()
-        self.writer = ThreadWriter()
-        self.visualizer = ImageVisualizer()
-        self.poster = TwitterPoster()
-        self.poster.authenticate_oauth2()
+        # Parsed posting history and the file version it came from
+        self._history: List[Dict] = []
+        self._history_mtime = None
         
+        # Content and posting components are properties created on first use,
+        # so read-only callers skip their setup and the OAuth handshake
         self.load_schedule_config()
         
+    @cached_property
+    def ideator(self) -> ContentIdeator:
+        """Content idea generator, created on first use"""
+        return ContentIdeator()
+        
+    @cached_property
+    def writer(self) -> ThreadWriter:
+        """Thread writer, created on first use"""
+        return ThreadWriter()
+        
+    @cached_property
+    def visualizer(self) -> ImageVisualizer:
+        """Image finder/generator for tweets, created on first use"""
+        return ImageVisualizer()
+        
+    @cached_property
+    def poster(self) -> TwitterPoster:
+        """Authenticated Twitter poster, created on first use"""
+        poster = TwitterPoster()
+        poster.authenticate_oauth2()
+        return poster
+        
     def load_schedule_config(self):
         """Load scheduling configuration"""
-        import yaml
         try:
-            with open('config.yaml', 'r') as f:
-                config = yaml.safe_load(f)
-                
+            config = load_config()
             scheduling = config.get('scheduling', {})
-            self.timezone = pytz.timezone(scheduling.get('timezone', 'Asia/Kolkata'))
+            self.timezone = _zone(scheduling.get('timezone', 'Asia/Kolkata'))
             self.post_times = scheduling.get('post_times', ['10:00', '19:00'])
             self.auto_post = scheduling.get('auto_post', False)
             
         except Exception as e:
             logger.warning(f"Could not load schedule config: {e}")
             
+        # Parse "HH:MM" post times once for the time calculations; a malformed
+        # entry (e.g. "9am") falls back to the default times like other bad config
+        try:
+            self._post_hm = tuple(_parse_hm(post_time) for post_time in self.post_times)
+            if not self._post_hm:
+                raise ValueError("no post times configured")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Invalid post_times {self.post_times!r} ({e}), using defaults")
+            self.post_times = ['10:00', '19:00']
+            self._post_hm = ((10, 0), (19, 0))
+            
     def schedule_daily_posts(self):
         """Set up daily posting schedule"""
         logger.info("Setting up daily posting schedule...")
@@ -65,12 +165,14 @@ class PostScheduler:
         
         # Schedule posts for each time
         for post_time in self.post_times:
-            schedule.every().day.at(post_time).do(self._create_and_post_thread)
+            schedule.every().day.at(post_time).do(self._enqueue_job, self._create_and_post_thread)
             logger.info(f"Scheduled daily post at {post_time} IST")
             
         # Start scheduler thread if not running
         if not self.is_running:
             self.start_scheduler()
+        else:
+            self._wakeup.set()
             
     def start_scheduler(self):
         """Start the background scheduler"""
@@ -79,25 +181,55 @@ class PostScheduler:
             return
             
         self.is_running = True
-        self.scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
+        # A fresh event per thread, so a quick stop/start can't revive the old loop
+        self._stop_event = threading.Event()
+        self._job_queue = queue.Queue()
+        self.scheduler_thread = threading.Thread(target=self._run_scheduler, args=(self._stop_event,), daemon=True)
+        self.worker_thread = threading.Thread(target=self._run_worker, args=(self._job_queue,), daemon=True)
         self.scheduler_thread.start()
+        self.worker_thread.start()
         logger.info("Scheduler started in background thread")
         
     def stop_scheduler(self):
         """Stop the background scheduler"""
         self.is_running = False
+        self._stop_event.set()
         schedule.clear()
+        self._wakeup.set()
+        self._job_queue.put(None)
         logger.info("Scheduler stopped")
         
-    def _run_scheduler(self):
-        """Run the scheduler loop"""
-        while self.is_running:
+    def _run_scheduler(self, stop_event: threading.Event):
+        """Run the scheduler loop, sleeping until the next job is due"""
+        while not stop_event.is_set():
             try:
-                schedule.run_pending()
-                time.sleep(60)  # Check every minute
+                # Clear before reading the schedule so a change made meanwhile still wakes us
+                self._wakeup.clear()
+                idle_seconds = schedule.idle_seconds()
+                if idle_seconds is not None and idle_seconds <= 0:
+                    schedule.run_pending()
+                    continue
+                
+                # Re-check at least every 5 minutes, e.g. after clock changes
+                self._wakeup.wait(300 if idle_seconds is None else min(idle_seconds, 300))
             except Exception as e:
                 logger.error(f"Scheduler error: {e}")
-                time.sleep(60)
+                self._wakeup.wait(60)
+                
+    def _enqueue_job(self, job):
+        """Hand a due job to the worker thread"""
+        self._job_queue.put(job)
+        
+    def _run_worker(self, job_queue: queue.Queue):
+        """Run queued jobs one at a time until a None sentinel arrives"""
+        while True:
+            job = job_queue.get()
+            if job is None:
+                break
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Scheduled job error: {e}")
                 
     def _create_and_post_thread(self):
         """Create and post a thread automatically"""
@@ -122,11 +254,7 @@ class PostScheduler:
                 thread = self.writer.create_thread(topic)
                 
                 # Add images to tweets that need them
-                for tweet in thread['tweets']:
-                    if tweet.get('needs_image', False):
-                        image_data = self.visualizer.get_image(tweet['text'])
-                        if image_data:
-                            tweet['image'] = image_data
+                self._attach_images(thread)
             
             # Post the thread
             success = self.poster.post_thread(thread)
@@ -141,17 +269,23 @@ class PostScheduler:
         except Exception as e:
             logger.error(f"Error in scheduled posting: {e}")
             
+    def _attach_images(self, thread: Dict):
+        """Fetch images for the tweets that need them"""
+        # The visualizer fetches a thread's images concurrently and skips pictures
+        # already posted; only create it when some tweet needs an image
+        if any(tweet.get('needs_image', False) for tweet in thread['tweets']):
+            self.visualizer.get_images_for_thread(thread['tweets'])
+                    
     def _should_post_promotional(self) -> bool:
         """Determine if we should post promotional content"""
         try:
-            with open('data/history.json', 'r') as f:
-                history = json.load(f)
+            history = self._load_history()
                 
             # Post promotional content every 7th post
             if len(history) % 7 == 0 and len(history) > 0:
                 return True
                 
-        except (FileNotFoundError, json.JSONDecodeError):
+        except (FileNotFoundError, ValueError):
             pass
             
         return False
@@ -162,27 +296,23 @@ class PostScheduler:
         # IST times and their global equivalents
         times_analysis = []
         
-        for post_time in self.post_times:
-            # Parse IST time
-            hour, minute = map(int, post_time.split(':'))
-            ist_time = self.timezone.localize(
-                datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-            )
+        for post_time, (hour, minute) in zip(self.post_times, self._post_hm):
+            ist_time = datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0, tzinfo=self.timezone)
             
             # Convert to major timezones
-            utc_time = ist_time.astimezone(pytz.UTC)
-            et_time = ist_time.astimezone(pytz.timezone('US/Eastern'))
-            pt_time = ist_time.astimezone(pytz.timezone('US/Pacific'))
-            gmt_time = ist_time.astimezone(pytz.timezone('Europe/London'))
+            utc_time = ist_time.astimezone(_TZ_UTC)
+            et_time = ist_time.astimezone(_zone('US/Eastern'))
+            pt_time = ist_time.astimezone(_zone('US/Pacific'))
+            gmt_time = ist_time.astimezone(_zone('Europe/London'))
             
             analysis = {
                 'ist_time': post_time,
-                'utc_time': utc_time.strftime('%H:%M'),
-                'eastern_time': et_time.strftime('%H:%M'),
-                'pacific_time': pt_time.strftime('%H:%M'),
-                'london_time': gmt_time.strftime('%H:%M'),
+                'utc_time': _format_hm(utc_time),
+                'eastern_time': _format_hm(et_time),
+                'pacific_time': _format_hm(pt_time),
+                'london_time': _format_hm(gmt_time),
                 'engagement_score': self._calculate_engagement_score(ist_time),
-                'target_audience': self._get_target_audience(ist_time)
+                'target_audience': self._get_target_audience(utc_time.hour)
             }
             
             times_analysis.append(analysis)
@@ -191,34 +321,11 @@ class PostScheduler:
         
     def _calculate_engagement_score(self, time: datetime) -> int:
         """Calculate estimated engagement score for a time"""
-        hour = time.hour
-        
-        # Peak engagement hours (based on global Twitter usage)
-        peak_hours = {
-            6: 70,   # 10am IST = 6am-12am EST (good for US morning)
-            7: 75,
-            8: 80,
-            9: 85,
-            13: 90,  # 7pm IST = 1:30pm UTC (good for EU afternoon + US morning)
-            14: 85,
-            15: 80,
-            16: 75
-        }
+        return _ENGAGEMENT_BY_HOUR[time.hour]
         
-        return peak_hours.get(hour, 50)  # Default score of 50
-        
-    def _get_target_audience(self, time: datetime) -> str:
-        """Identify primary target audience for posting time"""
-        utc_hour = time.astimezone(pytz.UTC).hour
-        
-        if 12 <= utc_hour <= 16:
-            return "US Morning + EU Afternoon"
-        elif 4 <= utc_hour <= 8:
-            return "US Evening + Asia Morning"
-        elif 20 <= utc_hour <= 23:
-            return "EU Evening + US Afternoon"
-        else:
-            return "Global Mixed"
+    def _get_target_audience(self, utc_hour: int) -> str:
+        """Identify primary target audience for a UTC posting hour"""
+        return _AUDIENCE_BY_UTC_HOUR[utc_hour]
             
     def schedule_one_time_post(self, delay_minutes: int, topic: str = None):
         """Schedule a one-time post after delay"""
@@ -227,7 +334,8 @@ class PostScheduler:
         def delayed_post():
             self._create_and_post_thread_with_topic(topic)
             
-        schedule.every().day.at(post_time.strftime('%H:%M')).do(delayed_post).tag('onetime')
+        schedule.every().day.at(post_time.strftime('%H:%M')).do(self._enqueue_job, delayed_post).tag('onetime')
+        self._wakeup.set()
         
         logger.info(f"Scheduled one-time post for {post_time.strftime('%H:%M')}")
         
@@ -241,11 +349,7 @@ class PostScheduler:
                 thread = self.writer.create_thread(ideas[0]['title'])
                 
             # Add images
-            for tweet in thread['tweets']:
-                if tweet.get('needs_image', False):
-                    image_data = self.visualizer.get_image(tweet['text'])
-                    if image_data:
-                        tweet['image'] = image_data
+            self._attach_images(thread)
                         
             # Post thread
             success = self.poster.post_thread(thread)
@@ -264,23 +368,16 @@ class PostScheduler:
         """Get the next scheduled post time"""
         try:
             now = datetime.now(self.timezone)
-            today = now.date()
             
-            for post_time in self.post_times:
-                hour, minute = map(int, post_time.split(':'))
-                scheduled_time = self.timezone.localize(
-                    datetime.combine(today, datetime.min.time().replace(hour=hour, minute=minute))
-                )
+            # Compare wall-clock times and attach the zone only to the chosen slot
+            upcoming = [hm for hm in self._post_hm if hm > (now.hour, now.minute)]
+            if upcoming:
+                day, (hour, minute) = now.date(), min(upcoming)
+            else:
+                # If no more posts today, return first post tomorrow
+                day, (hour, minute) = now.date() + timedelta(days=1), min(self._post_hm)
                 
-                if scheduled_time > now:
-                    return scheduled_time
-                    
-            # If no more posts today, return first post tomorrow
-            tomorrow = today + timedelta(days=1)
-            hour, minute = map(int, self.post_times[0].split(':'))
-            return self.timezone.localize(
-                datetime.combine(tomorrow, datetime.min.time().replace(hour=hour, minute=minute))
-            )
+            return datetime(day.year, day.month, day.day, hour, minute, tzinfo=self.timezone)
             
         except Exception as e:
             logger.error(f"Error calculating next post time: {e}")
@@ -289,34 +386,40 @@ class PostScheduler:
     def get_posting_statistics(self) -> Dict:
         """Get posting frequency and timing statistics"""
         try:
-            with open('data/history.json', 'r') as f:
-                history = json.load(f)
+            history = self._load_history()
                 
             if not history:
                 return {'total_posts': 0, 'message': 'No posting history'}
                 
-            # Analyze posting patterns
+            # Analyze posting patterns in a single pass
+            now = datetime.now()
             post_times = []
-            post_hours = []
+            hour_counts = [0] * 24
+            posts_last_7_days = 0
+            posts_last_30_days = 0
             
             for post in history:
                 try:
                     timestamp = datetime.fromisoformat(post['timestamp'])
-                    post_times.append(timestamp)
-                    post_hours.append(timestamp.hour)
                 except:
                     continue
                     
+                post_times.append(timestamp)
+                hour_counts[timestamp.hour] += 1
+                age_days = (now - timestamp).days
+                if age_days <= 7:
+                    posts_last_7_days += 1
+                if age_days <= 30:
+                    posts_last_30_days += 1
+                    
             if not post_times:
                 return {'total_posts': 0, 'message': 'No valid timestamps'}
                 
             # Calculate statistics
             total_posts = len(post_times)
-            posts_last_7_days = len([t for t in post_times if (datetime.now() - t).days <= 7])
-            posts_last_30_days = len([t for t in post_times if (datetime.now() - t).days <= 30])
             
-            # Most common posting hour
-            most_common_hour = max(set(post_hours), key=post_hours.count) if post_hours else 0
+            # Most common posting hour (earliest hour wins ties)
+            most_common_hour = max(range(24), key=hour_counts.__getitem__)
             
             return {
                 'total_posts': total_posts,
@@ -337,46 +440,56 @@ class PostScheduler:
         if len(post_times) < 7:
             return "Insufficient data"
             
-        # Calculate average time between posts
-        intervals = []
-        for i in range(1, len(post_times)):
-            interval = (post_times[i] - post_times[i-1]).total_seconds() / 3600  # hours
-            intervals.append(interval)
-            
-        if intervals:
-            avg_interval = sum(intervals) / len(intervals)
-            if avg_interval <= 15:  # Less than 15 hours average
-                return "Very Consistent"
-            elif avg_interval <= 24:  # Less than 24 hours average
-                return "Consistent"
-            elif avg_interval <= 48:  # Less than 48 hours average
-                return "Moderate"
-            else:
-                return "Inconsistent"
-                
-        return "Unknown"
+        # Consecutive intervals telescope, so their mean is the total span over the gap count
+        avg_interval = (post_times[-1] - post_times[0]).total_seconds() / 3600 / (len(post_times) - 1)  # hours
+        return _CONSISTENCY_LABELS[bisect.bisect_left(_CONSISTENCY_THRESHOLDS, avg_interval)]
         
-    def _save_to_history(self, thread: Dict):
-        """Save thread to posting history"""
+    def _load_history(self) -> List[Dict]:
+        """Return the posting history, re-reading the file only when it changed"""
         try:
-            with open('data/history.json', 'r') as f:
-                history = json.load(f)
+            mtime = os.stat(HISTORY_PATH).st_mtime_ns
         except FileNotFoundError:
-            history = []
+            return []
+            
+        # Other writers (e.g. the CLI) share the file, so validate against its mtime
+        if mtime != self._history_mtime:
+            with open(HISTORY_PATH, 'rb') as f:
+                self._history = json_utils.loads(f.read())
+            self._history_mtime = mtime
             
-        history.append({
+        return self._history
+        
+    def _save_to_history(self, thread: Dict):
+        """Save thread to posting history"""
+        # Gather the tweet stats in one pass
+        tweet_count = total_chars = 0
+        has_images = False
+        for t in thread['tweets']:
+            tweet_count += 1
+            total_chars += len(t['text'])
+            has_images = has_images or bool(t.get('image'))
+            
+        # Build a new list rather than appending to the cached one, so a failed
+        # write leaves the in-memory history matching the file
+        history = self._load_history() + [{
             'timestamp': datetime.now().isoformat(),
             'topic': thread.get('topic', 'Unknown'),
-            'tweet_count': len(thread['tweets']),
-            'total_chars': sum(len(t['text']) for t in thread['tweets']),
+            'tweet_count': tweet_count,
+            'total_chars': total_chars,
             'hashtags': thread.get('hashtags', []),
-            'has_images': any(t.get('image') for t in thread['tweets']),
+            'has_images': has_images,
             'scheduled': True,
-            'posting_time': datetime.now(self.timezone).strftime('%H:%M')
-        })
+            'posting_time': _format_hm(datetime.now(self.timezone))
+        }]
         
-        with open('data/history.json', 'w') as f:
-            json.dump(history, f, indent=2)
+        # Serialize first and swap the file in atomically, so a failure never truncates it
+        data = json_utils.dumps(history, indent=True)
+        tmp_path = f"{HISTORY_PATH}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, HISTORY_PATH)
+        self._history = history
+        self._history_mtime = os.stat(HISTORY_PATH).st_mtime_ns
             
     def _update_post_stats(self):
         """Update posting statistics"""
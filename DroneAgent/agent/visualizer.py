@@ -3,24 +3,123 @@ Image Visualizer Module
 Fetches and generates drone-related images for Twitter threads
 """
 
+import hashlib
 import os
 import re
+import traceback
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv, find_dotenv
 import random
-from typing import Dict, Optional, List
+import threading
+from typing import ClassVar, Dict, Optional, List, Tuple
 from pathlib import Path
 import json
 from datetime import datetime
 from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: used for Gemini output and duplicate checks
+    Image = None
+
+try:
+    from google import genai
+    from google.genai import types
+except ImportError:  # google-genai is optional: only Gemini image generation needs it
+    genai = None
+    types = None
+
 from utils.logger import setup_logger
+from utils.rate_limiter import RateLimiter
+from utils import json_utils
+from utils.cache import ResponseCache
 
 logger = setup_logger(__name__)
 
+# Upper bound on concurrent image fetches per thread
+_MAX_IMAGE_WORKERS = 8
+
+# Shared HTTP session so searches and downloads reuse pooled keep-alive connections.
+# Gateway errors are retried with backoff; 429s are not, since the rate limiters
+# pause the source and the tweet falls back to another one.
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        raise_on_status=False
+    )
+))
+
+# Images whose 64-bit difference hashes differ in fewer bits count as the same picture
+_DUPLICATE_HASH_DISTANCE = 6
+
+# Hashtags are dropped before picking search words
+_HASHTAG_RE = re.compile(r'#\w+')
+
+# Words that already make a search term drone-specific (lowercase)
+_SEARCH_TERM_DRONE_WORDS = ("drone", "uav", "quadcopter", "aerial", "dji", "flying", "flight", "camera")
+
+# Filler words skipped when picking search words
+_SEARCH_TERM_STOPWORDS = frozenset({"with", "that", "this", "then", "than", "from", "your", "will", "they", "them"})
+
+# Drone-related image keywords by content category
+_DRONE_KEYWORDS = {
+    'fpv': ['fpv racing', 'racing drone', 'first person view'],
+    'diy': ['drone building', 'diy drone', 'drone parts'],
+    'commercial': ['commercial drone', 'industry drone', 'professional drone'],
+    'military': ['military drone', 'uav', 'surveillance drone'],
+    'photography': ['aerial photography', 'drone camera', 'aerial view'],
+    'agriculture': ['agricultural drone', 'farming drone', 'crop monitoring'],
+    'delivery': ['delivery drone', 'package delivery', 'drone logistics'],
+    'racing': ['drone racing', 'fpv racing', 'racing quadcopter'],
+    'technology': ['drone technology', 'quadcopter', 'autonomous drone'],
+    'build': ['drone build', 'quadcopter assembly', 'drone components'],
+    'history': ['vintage drone', 'early drone', 'drone evolution'],
+    'future': ['future drone', 'advanced drone', 'ai drone']
+}
+
+# (terms that match a category, its top 2 keywords), in category order
+_DRONE_KEYWORD_MATCHES = tuple(
+    ((category, *terms), tuple(terms[:2])) for category, terms in _DRONE_KEYWORDS.items()
+)
+
+# Bytes written per chunk when streaming image downloads to disk
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Results requested per search; a thread draws distinct photos from one page
+_SEARCH_PAGE_SIZE = 30
+
+# Cached search results are refreshed daily so new photos keep entering the pool
+_SEARCH_CACHE_TTL = 24 * 3600
+
+# Hashes and photo ids of the most recently used images kept for duplicate checks across runs
+_HASH_INDEX_SIZE = 500
+
+# Search results to pick from, among those whose photo ids haven't been used yet
+_PICK_TOP_UNUSED = 5
+
+# Photos tried per stock source when fallback images keep turning out to be duplicates
+_CLAIM_ATTEMPTS = 3
+
+# Result pages searched for an unused photo before repeating the least recently used one
+_MAX_SEARCH_PAGES = 5
+
 class ImageVisualizer:
+    # Settings parsed from the environment, shared by all instances, and the .env version they came from
+    _env_config: ClassVar[Optional[Dict]] = None
+    _env_stamp: ClassVar[Optional[Tuple]] = None
+    
     def __init__(self):
         self.load_config()
         self.setup_apis()
@@ -37,20 +136,40 @@ class ImageVisualizer:
         # Track post number for consistent naming
         self.current_post_number = 1
         
+        # Perceptual hashes and (source, photo id) pairs of recently used images, so
+        # pictures aren't posted again; photo ids let searches skip them before downloading
+        self.hash_index_path = self.image_cache_dir / "hash_index.json"
+        self._seen_hashes, self._used_photo_ids = self._load_hash_index()
+        self._index_lock = threading.Lock()
+        
     def load_config(self):
         """Load configuration from environment variables"""
-        from dotenv import load_dotenv
-        load_dotenv()
-        
-        self.unsplash_key = os.getenv('UNSPLASH_ACCESS_KEY')
-        self.unsplash_secret = os.getenv('UNSPLASH_SECRET_KEY')
-        self.unsplash_app_name = os.getenv('UNSPLASH_APP_NAME', 'DroneAgent_Twitter_Bot')
-        self.unsplash_attribution_required = os.getenv('UNSPLASH_ATTRIBUTION_REQUIRED', 'true').lower() == 'true'
-        self.unsplash_max_per_hour = int(os.getenv('UNSPLASH_MAX_IMAGES_PER_HOUR', '50'))
-        self.unsplash_download_tracking = os.getenv('UNSPLASH_DOWNLOAD_TRACKING', 'true').lower() == 'true'
-        self.pexels_key = os.getenv('PEXELS_API_KEY')
-        self.gemini_key = os.getenv('GEMINI_API_KEY')
-        self.gemini_project_id = os.getenv('GEMINI_PROJECT_ID', 'your-project-id')
+        # .env is only re-read when it changed (e.g. keys saved from the API manager)
+        dotenv_path = find_dotenv()
+        try:
+            env_stamp = (dotenv_path, os.stat(dotenv_path).st_mtime_ns)
+        except OSError:
+            env_stamp = (dotenv_path, None)
+            
+        cls = type(self)
+        if cls._env_config is None or cls._env_stamp != env_stamp:
+            if dotenv_path:
+                load_dotenv(dotenv_path)
+            cls._env_config = {
+                'unsplash_key': os.getenv('UNSPLASH_ACCESS_KEY'),
+                'unsplash_secret': os.getenv('UNSPLASH_SECRET_KEY'),
+                'unsplash_app_name': os.getenv('UNSPLASH_APP_NAME', 'DroneAgent_Twitter_Bot'),
+                'unsplash_attribution_required': os.getenv('UNSPLASH_ATTRIBUTION_REQUIRED', 'true').lower() == 'true',
+                'unsplash_max_per_hour': int(os.getenv('UNSPLASH_MAX_IMAGES_PER_HOUR', '50')),
+                'unsplash_download_tracking': os.getenv('UNSPLASH_DOWNLOAD_TRACKING', 'true').lower() == 'true',
+                'pexels_key': os.getenv('PEXELS_API_KEY'),
+                'pexels_max_per_hour': int(os.getenv('PEXELS_MAX_REQUESTS_PER_HOUR', '200')),
+                'gemini_key': os.getenv('GEMINI_API_KEY'),
+                'gemini_project_id': os.getenv('GEMINI_PROJECT_ID', 'your-project-id')
+            }
+            cls._env_stamp = env_stamp
+            
+        self.__dict__.update(cls._env_config)
         
     def setup_apis(self):
         """Initialize API clients"""
@@ -63,15 +182,33 @@ class ImageVisualizer:
             'Authorization': self.pexels_key
         } if self.pexels_key else None
         
+        # Request budgets shared by concurrent fetches, so a thread can't burst past the API quotas
+        self._limiters = {
+            'unsplash': RateLimiter('Unsplash', self.unsplash_max_per_hour),
+            'pexels': RateLimiter('Pexels', self.pexels_max_per_hour),
+            'gemini': RateLimiter('Gemini', max_concurrent=2)
+        }
+        
+        # Search results by query; the query vocabulary is small, so repeats are common
+        self._search_cache = ResponseCache('image_search', max_memory_items=256)
+        
         # Setup Gemini API
         try:
             if self.gemini_key and self.gemini_key != "your_gemini_api_key_here":
-                import google.generativeai as genai
-                genai.configure(api_key=self.gemini_key)
+                import google.generativeai as legacy_genai
+                legacy_genai.configure(api_key=self.gemini_key)
                 logger.info("Gemini API configured successfully")
         except Exception as e:
             logger.warning(f"Failed to configure Gemini API: {e}")
         
+        # One image generation client per instance, so its connection is reused across calls
+        self._gemini_client = None
+        try:
+            if genai is not None and self.gemini_key:
+                self._gemini_client = genai.Client(api_key=self.gemini_key)
+        except Exception as e:
+            logger.warning(f"Failed to create Gemini client: {e}")
+        
     def get_images_for_thread(self, thread_tweets: List[Dict], user_images: Dict[int, str] = None) -> List[Dict]:
         """Get images for an entire thread with distribution: 50% Gemini, 25% Pexels, 25% Unsplash"""
         logger.info(f"Getting images for thread with {len(thread_tweets)} tweets")
@@ -88,10 +225,6 @@ class ImageVisualizer:
             
         print(f"📸 Generating {total_images_needed} images for thread...")
         
-        # Track used search terms to ensure uniqueness
-        used_search_terms = set()
-        used_image_urls = set()
-        
         # Check if Gemini API is available
         if self.gemini_key:
             # Updated distribution: 50% Gemini, 25% Pexels, 25% Unsplash
@@ -126,7 +259,9 @@ class ImageVisualizer:
             logger.info(f"Gemini unavailable, using: {gemini_count} Gemini, {pexels_count} Pexels, {unsplash_count} Unsplash")
         logger.info(f"First tweet will use {sources[0]} for image generation")
         
-        # Process each tweet that needs an image
+        # Resolve user images and search terms first, numbering the fetches up front
+        # so they can run concurrently without sharing a Post file name
+        jobs = []
         for idx, tweet_index in enumerate(image_tweets):
             tweet = thread_tweets[tweet_index]
             
@@ -142,51 +277,121 @@ class ImageVisualizer:
             source = sources[idx] if idx < len(sources) else 'unsplash'
             content = tweet.get('text', '')
             
-            # Generate a unique search term from the content
-            # Use the full tweet text for prompt uniqueness
-            search_term = content
+            # Use the full tweet text, tagged with the tweet number so each term is unique
+            search_term = f"{content} #{tweet_index + 1}"
             
-            # Ensure the search term is unique
-            original_term = search_term
-            attempt = 1
-            while search_term in used_search_terms and attempt < 5:
-                # Add qualifiers to make it unique
-                qualifiers = ["detailed", "advanced", "professional", "modern", "aerial", "close-up"]
-                search_term = f"{original_term} {random.choice(qualifiers)} {attempt}"
-                attempt += 1
+            print(f"🔄 Tweet {tweet_index + 1}: Getting image from {source.title()} using term: {search_term}")
             
-            # Mark this search term as used
-            used_search_terms.add(search_term)
+            post_number = self.current_post_number + len(jobs)
+            jobs.append((tweet_index, source, search_term, f"{content} alternative view", post_number))
             
-            print(f"🔄 Tweet {tweet_index + 1}: Getting image from {source.title()} using term: {search_term}")
+        if not jobs:
+            return thread_tweets
             
-            # Get image with the unique search term
-            image_data = self._get_image_from_source(search_term, source, self.current_post_number)
+        # Tweets share a small keyword vocabulary, so search each distinct query once up front
+        searches = {
+            (source, self._build_search_query(self._extract_keywords(search_term)))
+            for _, source, search_term, _, _ in jobs
+            if source in ('unsplash', 'pexels') and getattr(self, f'{source}_headers')
+        }
+        if searches:
+            self._prefetch_searches(sorted(searches))
             
-            # Check if this URL has already been used
-            if image_data and image_data.get('url') in used_image_urls:
-                print(f"⚠️ Tweet {tweet_index + 1}: Duplicate image detected, regenerating...")
-                image_data = None
+        # Image requests are network-bound, so fetch them all at once; each fetch
+        # claims its picture, so duplicates are replaced before the results come back
+        with ThreadPoolExecutor(max_workers=min(_MAX_IMAGE_WORKERS, len(jobs))) as executor:
+            results = list(executor.map(lambda job: self._fetch_thread_image(*job), jobs))
             
-            if image_data:
-                # Mark this URL as used
-                used_image_urls.add(image_data.get('url'))
+        for (tweet_index, source, _, _, post_number), (image_data, from_fallback) in zip(jobs, results):
+            tweet = thread_tweets[tweet_index]
+            
+            if not from_fallback:
                 tweet['image'] = image_data
-                print(f"✅ Tweet {tweet_index + 1}: {source.title()} image obtained as Post{self.current_post_number}")
-                self.current_post_number += 1
+                print(f"✅ Tweet {tweet_index + 1}: {source.title()} image obtained as Post{post_number}")
             else:
                 print(f"⚠️ Tweet {tweet_index + 1}: {source.title()} failed, trying fallback...")
-                # Try fallback sources with unique terms
-                fallback_term = f"{original_term} alternative view"
-                fallback_image = self._get_fallback_image(fallback_term, self.current_post_number)
-                if fallback_image and fallback_image.get('url') not in used_image_urls:
-                    used_image_urls.add(fallback_image.get('url'))
-                    tweet['image'] = fallback_image
-                    print(f"✅ Tweet {tweet_index + 1}: Fallback image obtained as Post{self.current_post_number}")
-                    self.current_post_number += 1
+                if image_data:
+                    tweet['image'] = image_data
+                    print(f"✅ Tweet {tweet_index + 1}: Fallback image obtained as Post{post_number}")
+                    
+        self.current_post_number += len(jobs)
+        self._save_hash_index()
         
         return thread_tweets
     
+    def _fetch_thread_image(self, tweet_index: int, source: str, search_term: str, fallback_term: str,
+                            post_number: int) -> Tuple[Optional[Dict], bool]:
+        """Get an unused image from the assigned source, else from the fallbacks; flags whether a fallback was used"""
+        image_data = self._get_image_from_source(search_term, source, post_number)
+        # Check if this picture has already been used, here or in an earlier thread
+        if image_data:
+            if self._claim_image(image_data):
+                return image_data, False
+            print(f"⚠️ Tweet {tweet_index + 1}: Duplicate image detected, regenerating...")
+        return self._get_fallback_image(fallback_term, post_number, claim=True, duplicate=image_data), True
+    
+    def _claim_image(self, image_data: Dict) -> bool:
+        """Record an image as used; False if it looks like one used before"""
+        image_hash = self._image_dhash(image_data.get('url', ''))
+        if image_hash is None:
+            # Remote or unreadable images can't be compared, so accept them
+            return True
+            
+        with self._index_lock:
+            if any(bin(image_hash ^ seen).count('1') < _DUPLICATE_HASH_DISTANCE for seen in self._seen_hashes):
+                return False
+            self._seen_hashes.append(image_hash)
+        return True
+        
+    @staticmethod
+    def _image_dhash(path: str) -> Optional[int]:
+        """64-bit difference hash of a local image file, or None if it can't be read"""
+        if Image is None or not os.path.isfile(path):
+            return None
+            
+        try:
+            with Image.open(path) as image:
+                # JPEGs can decode at a reduced scale, which is all the hash needs
+                image.draft('L', (64, 64))
+                pixels = list(image.convert('L').resize((9, 8), Image.LANCZOS).getdata())
+        except Exception as e:
+            logger.warning(f"Could not hash image {path}: {e}")
+            return None
+            
+        # One bit per horizontally adjacent pixel pair: is the left one brighter?
+        image_hash = 0
+        for row in range(0, 72, 9):
+            for col in range(row, row + 8):
+                image_hash = (image_hash << 1) | (pixels[col] > pixels[col + 1])
+        return image_hash
+        
+    def _load_hash_index(self) -> Tuple[List[int], Dict[Tuple[str, str], None]]:
+        """Load the hashes and photo ids of recently used images"""
+        try:
+            index = json_utils.loads(self.hash_index_path.read_bytes())
+        except FileNotFoundError:
+            return [], {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable image hash index: {e}")
+            return [], {}
+            
+        # Older indexes are a bare list of hashes
+        if isinstance(index, list):
+            return index, {}
+        photo_ids = dict.fromkeys((source, str(photo_id)) for source, photo_id in index.get('photo_ids', []))
+        return index.get('hashes', []), photo_ids
+            
+    def _save_hash_index(self):
+        """Persist the most recent image hashes and photo ids"""
+        with self._index_lock:
+            self._seen_hashes = self._seen_hashes[-_HASH_INDEX_SIZE:]
+            self._used_photo_ids = dict.fromkeys(list(self._used_photo_ids)[-_HASH_INDEX_SIZE:])
+            index = {'hashes': self._seen_hashes, 'photo_ids': list(self._used_photo_ids)}
+        try:
+            self.hash_index_path.write_bytes(json_utils.dumps(index))
+        except OSError as e:
+            logger.warning(f"Could not save image hash index: {e}")
+            
     def _get_image_from_source(self, content: str, source: str, post_number: int = 1) -> Optional[Dict]:
         """Get image from specific source"""
         keywords = self._extract_keywords(content)
@@ -201,8 +406,9 @@ class ImageVisualizer:
         
         return None
     
-    def _get_fallback_image(self, content: str, post_number: int = 1) -> Optional[Dict]:
-        """Try all sources as fallback"""
+    def _get_fallback_image(self, content: str, post_number: int = 1, claim: bool = False,
+                            duplicate: Optional[Dict] = None) -> Optional[Dict]:
+        """Try all sources as fallback; with claim, images already used are skipped unless nothing else is found"""
         keywords = self._extract_keywords(content)
         search_query = self._build_search_query(keywords)
         
@@ -210,21 +416,30 @@ class ImageVisualizer:
         sources = ['unsplash', 'pexels', 'gemini']
         
         for source in sources:
-            if source == 'gemini' and self.gemini_key:
-                image_data = self._generate_gemini_image(search_query, post_number)
-            elif source == 'pexels' and self.pexels_key:
-                image_data = self._search_pexels(search_query, post_number)
-            elif source == 'unsplash' and self.unsplash_key:
-                image_data = self._search_unsplash(search_query, post_number)
-            else:
-                continue
-                
-            if image_data:
-                return image_data
+            # Stock searches pick a fresh photo each time, so a rejected duplicate gets a few more tries
+            attempts = _CLAIM_ATTEMPTS if claim and source != 'gemini' else 1
+            for _ in range(attempts):
+                if source == 'gemini' and self.gemini_key:
+                    image_data = self._generate_gemini_image(search_query, post_number)
+                elif source == 'pexels' and self.pexels_key:
+                    image_data = self._search_pexels(search_query, post_number)
+                elif source == 'unsplash' and self.unsplash_key:
+                    image_data = self._search_unsplash(search_query, post_number)
+                else:
+                    break
+                    
+                if not image_data:
+                    break  # Source failed or has no unused photos left; move on to the next one
+                if not claim or self._claim_image(image_data):
+                    return image_data
+                duplicate = image_data  # Downloads share the Post file, so only the latest is still on disk
         
-        return None
+        # Repeating a picture beats posting the tweet without one
+        if duplicate:
+            logger.warning(f"No unused image found for '{search_query}', reusing a duplicate")
+        return duplicate
         
-    def get_image(self, topic: str) -> Optional[Dict]:
+    def get_image(self, topic: str, post_number: int = 1) -> Optional[Dict]:
         """Get a single image for a topic - used by ContentGenerationThread"""
         # Extract keywords from topic
         keywords = self._extract_keywords(topic)
@@ -235,7 +450,7 @@ class ImageVisualizer:
         # ALWAYS try Gemini first for testing purposes
         if self.gemini_key:
             logger.info("Attempting to use Gemini for image generation")
-            image_data = self._generate_gemini_image(search_query)
+            image_data = self._generate_gemini_image(search_query, post_number)
             if image_data:
                 logger.info("Successfully generated image with Gemini")
                 return image_data
@@ -249,7 +464,7 @@ class ImageVisualizer:
             
         for source in sources:
             logger.info(f"Trying {source} for image")
-            image_data = self._get_image_from_source(search_query, source)
+            image_data = self._get_image_from_source(search_query, source, post_number)
             if image_data:
                 logger.info(f"Successfully got image from {source}")
                 return image_data
@@ -257,7 +472,7 @@ class ImageVisualizer:
         # If all API sources fail, try one more time with Gemini
         if self.gemini_key:
             logger.info("All API sources failed, trying Gemini one more time")
-            image_data = self._generate_gemini_image(search_query)
+            image_data = self._generate_gemini_image(search_query, post_number)
             if image_data:
                 logger.info("Successfully generated image with Gemini on second attempt")
                 return image_data
@@ -272,19 +487,16 @@ class ImageVisualizer:
             # Check if it's a URL or file path
             if image_path.startswith('http'):
                 # Download the image
-                response = requests.get(image_path)
-                if response.status_code == 200:
-                    local_path = self.image_cache_dir / f"user_image_{tweet_index}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                    with open(local_path, 'wb') as f:
-                        f.write(response.content)
-                    
-                    return {
-                        'url': image_path,
-                        'local_path': str(local_path),
-                        'source': 'user_url',
-                        'alt_text': f'User-provided image for tweet {tweet_index + 1}',
-                        'attribution': 'User provided'
-                    }
+                local_path = self.image_cache_dir / f"user_image_{tweet_index}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
+                self._download_to(image_path, local_path, timeout=30)
+                
+                return {
+                    'url': image_path,
+                    'local_path': str(local_path),
+                    'source': 'user_url',
+                    'alt_text': f'User-provided image for tweet {tweet_index + 1}',
+                    'attribution': 'User provided'
+                }
             else:
                 # Local file path
                 if os.path.exists(image_path):
@@ -305,13 +517,11 @@ class ImageVisualizer:
     def _extract_search_term(self, content: str) -> str:
         """Extract a relevant search term from tweet content for unique image generation"""
         # Remove hashtags
-        clean_content = re.sub(r'#\w+', '', content)
-        
-        # Define drone-specific keywords to look for
-        drone_keywords = ["drone", "UAV", "quadcopter", "aerial", "DJI", "flying", "flight", "camera"]
+        clean_content = _HASHTAG_RE.sub('', content)
         
         # Check if content contains drone keywords
-        has_drone_term = any(keyword.lower() in clean_content.lower() for keyword in drone_keywords)
+        clean_lower = clean_content.lower()
+        has_drone_term = any(keyword in clean_lower for keyword in _SEARCH_TERM_DRONE_WORDS)
         
         # If content doesn't explicitly mention drones, add "drone" to ensure relevance
         if not has_drone_term:
@@ -326,7 +536,7 @@ class ImageVisualizer:
         for word in words:
             word = word.strip().lower()
             # Skip short words and common filler words
-            if len(word) > 3 and word not in ["with", "that", "this", "then", "than", "from", "your", "will", "they", "them"]:
+            if len(word) > 3 and word not in _SEARCH_TERM_STOPWORDS:
                 important_words.append(word)
         
         # Select a few important words
@@ -342,29 +552,15 @@ class ImageVisualizer:
 
     def _extract_keywords(self, content: str) -> List[str]:
         """Extract relevant keywords for image search"""
-        # Drone-related keywords
-        drone_keywords = {
-            'fpv': ['fpv racing', 'racing drone', 'first person view'],
-            'diy': ['drone building', 'diy drone', 'drone parts'],
-            'commercial': ['commercial drone', 'industry drone', 'professional drone'],
-            'military': ['military drone', 'uav', 'surveillance drone'], 
-            'photography': ['aerial photography', 'drone camera', 'aerial view'],
-            'agriculture': ['agricultural drone', 'farming drone', 'crop monitoring'],
-            'delivery': ['delivery drone', 'package delivery', 'drone logistics'],
-            'racing': ['drone racing', 'fpv racing', 'racing quadcopter'],
-            'technology': ['drone technology', 'quadcopter', 'autonomous drone'],
-            'build': ['drone build', 'quadcopter assembly', 'drone components'],
-            'history': ['vintage drone', 'early drone', 'drone evolution'],
-            'future': ['future drone', 'advanced drone', 'ai drone']
-        }
-        
         content_lower = content.lower()
         keywords = []
         
-        # Find matching categories
-        for category, terms in drone_keywords.items():
-            if any(term in content_lower for term in [category] + terms):
-                keywords.extend(terms[:2])  # Add top 2 terms
+        # Find matching categories, stopping once there are enough keywords
+        for match_terms, top_terms in _DRONE_KEYWORD_MATCHES:
+            if any(term in content_lower for term in match_terms):
+                keywords.extend(top_terms)
+                if len(keywords) >= 3:
+                    break
                 
         # Default drone terms if no specific match
         if not keywords:
@@ -380,6 +576,103 @@ class ImageVisualizer:
         # Use most specific keyword
         return keywords[0]
         
+    def _cached_search(self, source: str, url: str, headers: Dict, params: Dict, results_key: str) -> Optional[List[Dict]]:
+        """Search results from the cache, else from the API; None when the source's request budget is used up"""
+        cache_key = ResponseCache.make_key(source, url, sorted(params.items()))
+        results = self._search_cache.get(cache_key, max_age=_SEARCH_CACHE_TTL)
+        if results is not None:
+            return results
+            
+        limiter = self._limiters[source]
+        if not limiter.try_acquire():
+            logger.warning(f"{source.title()} request budget used up, skipping")
+            return None
+            
+        with limiter:
+            response = _SESSION.get(url, headers=headers, params=params, timeout=10)
+        limiter.record_response(response)
+        response.raise_for_status()
+        
+        results = json_utils.loads(response.content).get(results_key, [])
+        if results:
+            self._search_cache.set(cache_key, results)
+        return results
+        
+    def _unsplash_results(self, query: str, page: int = 1) -> Optional[List[Dict]]:
+        """Unsplash search results for a query"""
+        params = {
+            'query': query,
+            'page': page,
+            'per_page': _SEARCH_PAGE_SIZE,
+            'orientation': 'landscape',
+            'content_filter': 'high',
+            'order_by': 'relevant'
+        }
+        return self._cached_search('unsplash', "https://api.unsplash.com/search/photos", self.unsplash_headers, params, 'results')
+        
+    def _pexels_results(self, query: str, page: int = 1) -> Optional[List[Dict]]:
+        """Pexels search results for a query"""
+        params = {
+            'query': query,
+            'page': page,
+            'per_page': _SEARCH_PAGE_SIZE,
+            'orientation': 'landscape'
+        }
+        return self._cached_search('pexels', "https://api.pexels.com/v1/search", self.pexels_headers, params, 'photos')
+        
+    def _pick_result(self, source: str, results: List[Dict]) -> Optional[Dict]:
+        """Pick one of the top results whose photo hasn't been used yet; None when the whole page has been"""
+        with self._index_lock:
+            unused = [result for result in results if (source, str(result['id'])) not in self._used_photo_ids]
+            if not unused:
+                return None
+            image = random.choice(unused[:_PICK_TOP_UNUSED])
+            self._used_photo_ids[(source, str(image['id']))] = None
+        return image
+        
+    def _pick_least_recent(self, source: str, results: List[Dict]) -> Dict:
+        """Pick the result whose photo was used longest ago, marking it as just used"""
+        with self._index_lock:
+            by_key = {(source, str(result['id'])): result for result in results}
+            key = next((key for key in self._used_photo_ids if key in by_key), next(iter(by_key)))
+            self._used_photo_ids.pop(key, None)
+            self._used_photo_ids[key] = None
+        return by_key[key]
+        
+    def _pick_photo(self, source: str, query: str) -> Optional[Dict]:
+        """Pick an unused photo for a query, paging further once the first results have all been used"""
+        search = self._unsplash_results if source == 'unsplash' else self._pexels_results
+        
+        first_page = None
+        for page in range(1, _MAX_SEARCH_PAGES + 1):
+            results = search(query, page)
+            if not results:
+                break  # Out of results or request budget
+            first_page = first_page or results
+            image = self._pick_result(source, results)
+            if image:
+                return image
+                
+        # Every photo found has been used; repeating the stalest beats going without
+        if first_page:
+            logger.info(f"All {source.title()} results for '{query}' used, repeating the least recent")
+            return self._pick_least_recent(source, first_page)
+        return None
+        
+    def _prefetch_searches(self, searches: List[Tuple[str, str]]):
+        """Run each distinct (source, query) search once, so the per-tweet fetches hit the cache"""
+        search_functions = {'unsplash': self._unsplash_results, 'pexels': self._pexels_results}
+        
+        def _prefetch(search: Tuple[str, str]):
+            source, query = search
+            try:
+                search_functions[source](query)
+            except Exception as e:
+                logger.warning(f"{source.title()} search for '{query}' failed: {e}")
+                
+        with ThreadPoolExecutor(max_workers=min(_MAX_IMAGE_WORKERS, len(searches))) as executor:
+            list(executor.map(_prefetch, searches))
+            
     def _search_unsplash(self, query: str, post_number: int = 1) -> Optional[Dict]:
         """Search Unsplash for images"""
         if not self.unsplash_headers:
@@ -387,30 +680,15 @@ class ImageVisualizer:
             return None
             
         try:
-            url = "https://api.unsplash.com/search/photos"
-            params = {
-                'query': query,
-                'per_page': 10,
-                'orientation': 'landscape',
-                'content_filter': 'high',
-                'order_by': 'relevant'
-            }
-            
-            response = requests.get(url, headers=self.unsplash_headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('results'):
-                image = random.choice(data['results'][:5])  # Pick from top 5
-                
+            image = self._pick_photo('unsplash', query)
+            if image:
                 # Track download if enabled (required by Unsplash API guidelines)
                 if self.unsplash_download_tracking:
                     try:
                         # Check if download_location exists in the response
                         download_url = image.get('links', {}).get('download_location')
                         if download_url:
-                            download_response = requests.get(
+                            download_response = _SESSION.get(
                                 download_url,
                                 headers=self.unsplash_headers,
                                 timeout=5
@@ -421,7 +699,7 @@ class ImageVisualizer:
                                 logger.warning(f"Download tracking failed with status: {download_response.status_code}")
                         else:
                             # For newer Unsplash API versions, use the dedicated tracking endpoint
-                            download_response = requests.get(
+                            download_response = _SESSION.get(
                                 f"https://api.unsplash.com/photos/{image['id']}/download",
                                 headers=self.unsplash_headers,
                                 timeout=5
@@ -436,11 +714,7 @@ class ImageVisualizer:
                 filepath = os.path.abspath(os.path.join(self.ai_images_dir, filename))
                 
                 # Download the image
-                img_response = requests.get(image_url, timeout=10)
-                img_response.raise_for_status()
-                
-                with open(filepath, 'wb') as f:
-                    f.write(img_response.content)
+                self._download_to(image_url, filepath)
                 
                 logger.info(f"Successfully downloaded Unsplash image: {filepath}")
                 
@@ -473,32 +747,15 @@ class ImageVisualizer:
             return None
             
         try:
-            url = "https://api.pexels.com/v1/search"
-            params = {
-                'query': query,
-                'per_page': 10,
-                'orientation': 'landscape'
-            }
-            
-            response = requests.get(url, headers=self.pexels_headers, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if data.get('photos'):
-                image = random.choice(data['photos'][:5])  # Pick from top 5
-                
+            image = self._pick_photo('pexels', query)
+            if image:
                 # Download and save image with Post naming
                 image_url = image['src']['large']
                 filename = f"Post{post_number}.jpg"
                 filepath = os.path.abspath(os.path.join(self.ai_images_dir, filename))
                 
                 # Download the image
-                img_response = requests.get(image_url, timeout=10)
-                img_response.raise_for_status()
-                
-                with open(filepath, 'wb') as f:
-                    f.write(img_response.content)
+                self._download_to(image_url, filepath)
                 
                 logger.info(f"Successfully downloaded Pexels image: {filepath}")
                 
@@ -578,48 +835,45 @@ class ImageVisualizer:
         
     def _generate_gemini_image(self, query: str, post_number: int = 1) -> Optional[Dict]:
         """Generate image using Gemini 2 Flash using direct API approach"""
+        if genai is None or Image is None:
+            logger.error("Gemini image generation needs the google-genai and Pillow packages")
+            return None
+            
         try:
-            import base64
-            from io import BytesIO
-            from datetime import datetime
-            from PIL import Image
-            from google import genai
-            from google.genai import types
-
-            # Make sure we have the API key
+            # Make sure we have the API key and a client
             if not self.gemini_key:
                 logger.error("Gemini API key not found")
                 return None
+            client = self._gemini_client
+            if client is None:
+                logger.error("Gemini client is not available")
+                return None
 
             # Ensure AI_GENERATED_IMAGES directory exists
             self.ai_images_dir.mkdir(parents=True, exist_ok=True)
             
             logger.info(f"Generating image with Gemini 2 Flash for query: {query}")
             
-            # Initialize the client
-            client = genai.Client(api_key=self.gemini_key)
-
             # Enhance the prompt for better results
             # Use the full tweet text for a unique, post-specific prompt
-            import hashlib
-            tweet_hash = hashlib.md5(query.encode()).hexdigest()[:8]
+            tweet_hash = hashlib.blake2b(query.encode(), digest_size=4).hexdigest()
             timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
             unique_info = f" | UniqueID: {post_number}-{tweet_hash}-{timestamp}"
             enhanced_prompt = f"Create a professional, high-quality, photorealistic image for this Twitter post: '{query}'. The image should visually represent the content and mood of the tweet, with beautiful lighting and environment. Make it look like a professional drone photograph.{unique_info}"
 
             try:
                 # Generate the image using the direct API method
-                response = client.models.generate_content(
-                    model="gemini-2.0-flash-preview-image-generation",
-                    contents=enhanced_prompt,
-                    config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
-                )
+                with self._limiters['gemini']:
+                    response = client.models.generate_content(
+                        model="gemini-2.0-flash-preview-image-generation",
+                        contents=enhanced_prompt,
+                        config=types.GenerateContentConfig(response_modalities=['TEXT', 'IMAGE'])
+                    )
                 
                 # Process the response
                 for part in response.candidates[0].content.parts:
                     if part.inline_data:  # This is the image data
                         # Generate a unique filename using timestamp
-                        from datetime import datetime
                         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                         filename = f"Post_{post_number}_{timestamp}.png"
                         
@@ -654,16 +908,29 @@ class ImageVisualizer:
                 
             except Exception as inner_e:
                 logger.error(f"Gemini image generation API call failed: {inner_e}")
-                import traceback
                 logger.error(f"Detailed API error: {traceback.format_exc()}")
                 return None
                 
         except Exception as e:
             logger.error(f"Gemini 2 Flash image generation failed: {e}")
-            import traceback
             logger.error(f"Detailed error: {traceback.format_exc()}")
             return None
         
+    def _download_to(self, url: str, filepath, timeout: int = 10):
+        """Stream a remote file to disk in chunks rather than holding it in memory"""
+        tmp_path = f"{filepath}.{threading.get_ident()}.part"
+        try:
+            with _SESSION.get(url, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            # Only a complete download replaces the target file
+            os.replace(tmp_path, filepath)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+                
     def download_image(self, image_data: Dict) -> Optional[str]:
         """Download image to local cache"""
         if not image_data or image_data['source'] == 'placeholder':
@@ -671,8 +938,6 @@ class ImageVisualizer:
             
         try:
             url = image_data['url']
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
             
             # Generate filename
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -680,8 +945,7 @@ class ImageVisualizer:
             filepath = self.image_cache_dir / filename
             
             # Save image
-            with open(filepath, 'wb') as f:
-                f.write(response.content)
+            self._download_to(url, filepath, timeout=30)
                 
             logger.info(f"Downloaded image: {filepath}")
             return str(filepath)
@@ -775,7 +1039,7 @@ class ImageVisualizer:
             # Use a public endpoint to check rate limits - /photos is always accessible
             url = "https://api.unsplash.com/photos"
             params = {'per_page': 1}  # Minimize data transfer
-            response = requests.get(url, headers=self.unsplash_headers, params=params, timeout=5)
+            response = _SESSION.get(url, headers=self.unsplash_headers, params=params, timeout=5)
             
             rate_limit_info = {
                 'remaining': response.headers.get('X-Ratelimit-Remaining', 'Unknown'),
@@ -810,7 +1074,7 @@ class ImageVisualizer:
     def validate_image_url(self, url: str) -> bool:
         """Validate that image URL is accessible"""
         try:
-            response = requests.head(url, timeout=10)
+            response = _SESSION.head(url, timeout=10)
             return response.status_code == 200
         except:
             return False
@@ -848,7 +1112,7 @@ class ImageVisualizer:
             }
             
             logger.info(f"Testing Unsplash API connection...")
-            response = requests.get(url, headers=self.unsplash_headers, params=params, timeout=10)
+            response = _SESSION.get(url, headers=self.unsplash_headers, params=params, timeout=10)
             
             # Check rate limit headers
             rate_limit = {
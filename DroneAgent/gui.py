@@ -1305,7 +1305,7 @@ class DroneAgentGUI(QMainWindow):
     def load_history(self):
         """Load posting history"""
         try:
-            with open('data/history.json', 'r') as f:
+            with open('data/history.json', 'r', encoding='utf-8') as f:
                 history = json.load(f)
                 
             self.history_list.clear()
@@ -1322,7 +1322,7 @@ class DroneAgentGUI(QMainWindow):
             return
             
         try:
-            with open('data/history.json', 'r') as f:
+            with open('data/history.json', 'r', encoding='utf-8') as f:
                 history = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             history = []
@@ -1336,7 +1336,7 @@ class DroneAgentGUI(QMainWindow):
             'has_images': any(t.get('image') for t in self.current_thread['tweets'])
         })
         
-        with open('data/history.json', 'w') as f:
+        with open('data/history.json', 'w', encoding='utf-8') as f:
             json.dump(history, f, indent=2)
             
         self.load_history()
@@ -123,7 +123,7 @@ class DroneAgentCLI:
         logger.info("📊 Generating backtest analytics...")
         
         try:
-            with open('data/history.json', 'r') as f:
+            with open('data/history.json', 'r', encoding='utf-8') as f:
                 history = json.load(f)
         except FileNotFoundError:
             print("❌ No posting history found")
@@ -159,7 +159,7 @@ class DroneAgentCLI:
     def _save_to_history(self, thread):
         """Save thread to posting history"""
         try:
-            with open('data/history.json', 'r') as f:
+            with open('data/history.json', 'r', encoding='utf-8') as f:
                 history = json.load(f)
         except FileNotFoundError:
             history = []
@@ -173,7 +173,7 @@ class DroneAgentCLI:
             'has_images': any(t.get('image') for t in thread['tweets'])
         })
         
-        with open('data/history.json', 'w') as f:
+        with open('data/history.json', 'w', encoding='utf-8') as f:
             json.dump(history, f, indent=2)
 
 def main():
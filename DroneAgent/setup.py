@@ -6,6 +6,7 @@ Automates the initial setup process
 
 import os
 import shutil
+import sys
 from pathlib import Path
 
 def create_logs_directory():
@@ -55,10 +56,19 @@ def setup_config():
     else:
         print("❌ config.yaml not found")
 
+def check_python_version():
+    """Check that the interpreter is new enough"""
+    if sys.version_info < (3, 9):
+        print(f"❌ Python 3.9+ required, found {sys.version.split()[0]}")
+        return False
+    print(f"✅ Python {sys.version.split()[0]}")
+    return True
+
 def check_dependencies():
     """Check if required packages can be imported"""
     required_packages = [
-        'tweepy', 'PyQt5', 'requests', 'pytz', 'matplotlib'
+        'tweepy', 'PyQt5', 'requests', 'matplotlib',
+        'tzdata'  # timezone data for the scheduler on Windows
     ]
     
     missing_packages = []
@@ -82,6 +92,9 @@ def main():
     print("🚁 DroneAgent Setup")
     print("=" * 30)
     
+    if not check_python_version():
+        return
+    
     print("\n📁 Setting up directories...")
     create_logs_directory()
     
@@ -0,0 +1,139 @@
+"""
+Response Cache
+Two-tier (memory + disk) cache for API responses, keyed by a hash of the request.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from . import json_utils
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+DEFAULT_CACHE_DIR = Path(os.path.expanduser("~/.cache/drone_agent"))
+
+
+class ResponseCache:
+    """
+    Caches JSON-serializable values in an in-process LRU backed by one file per key on disk.
+
+    Args:
+        namespace (str): Sub-directory of the cache directory used for this cache.
+        max_memory_items (int): Number of entries kept in memory.
+        max_disk_items (int): Number of entry files kept on disk; the oldest are pruned.
+        cache_dir (Path): Root cache directory, defaults to ~/.cache/drone_agent.
+    """
+
+    def __init__(self, namespace: str, max_memory_items: int = 1024, max_disk_items: int = 4096,
+                 cache_dir: Optional[Path] = None):
+        self.directory = Path(cache_dir or DEFAULT_CACHE_DIR) / namespace
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._disk_count = None  # Entry files on disk, counted lazily on the first write
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a cache key from the parts that identify a request."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x1f")  # separator so ("ab", "c") != ("a", "bc")
+        return digest.hexdigest()
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss or when older than max_age seconds."""
+        with self._lock:
+            if key in self._memory:
+                stored_at, value = self._memory[key]
+                if max_age is None or time.time() - stored_at <= max_age:
+                    self._memory.move_to_end(key)
+                    return value
+                del self._memory[key]
+
+        path = self.directory / f"{key}.json"
+        try:
+            stored_at = path.stat().st_mtime
+            if max_age is not None and time.time() - stored_at > max_age:
+                self._unlink(path)
+                return None
+            value = json_utils.loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+        self._remember(key, value, stored_at)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value in memory and on disk."""
+        self._remember(key, value, time.time())
+
+        path = self.directory / f"{key}.json"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            is_new = not path.exists()
+            tmp_path.write_bytes(json_utils.dumps(value))
+            os.replace(tmp_path, path)  # atomic, so readers never see a partial file
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            if self._disk_count is None:
+                self._disk_count = sum(1 for _ in self.directory.glob("*.json"))
+            elif is_new:
+                self._disk_count += 1
+            over_limit = self._disk_count > self.max_disk_items
+        if over_limit:
+            self._prune_disk()
+
+    def clear(self) -> None:
+        """Remove all entries from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            self._disk_count = None
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def _prune_disk(self) -> None:
+        """Delete the oldest entry files until the disk tier is back under its limit."""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except OSError:
+                continue  # Removed by another writer meanwhile
+
+        # Prune down to 90% of the limit so the directory isn't rescanned on every write
+        keep = int(self.max_disk_items * 0.9)
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - keep)]:
+            self._unlink(path)
+
+        with self._lock:
+            self._disk_count = min(len(entries), keep)
+
+    @staticmethod
+    def _unlink(path: Path) -> None:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"Could not remove cache entry {path}: {e}")
+
+    def _remember(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (stored_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_items:
+                self._memory.popitem(last=False)
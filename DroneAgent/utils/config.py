@@ -2,28 +2,44 @@
 Configuration management utilities
 """
 
+import copy
+import functools
 import yaml
 import os
 from pathlib import Path
 
-def load_config():
-    """Load configuration from config.yaml"""
+def _config_path() -> Path:
+    """Locate config.yaml, preferring the project directory over its parent"""
     config_path = Path(__file__).parent.parent / "config.yaml"
     
     if not config_path.exists():
         # Try the parent directory
         config_path = Path(__file__).parent.parent.parent / "config.yaml"
+        
+    return config_path
+
+@functools.lru_cache(maxsize=4)
+def _load(path: str, mtime_ns: int, size: int):
+    """Parse a config file; the stat fields key the cache so edits are picked up"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)
+
+def load_config():
+    """Load configuration from config.yaml"""
+    config_path = _config_path()
     
-    if config_path.exists():
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
-    else:
+    try:
+        stat = os.stat(config_path)
+    except FileNotFoundError:
         # Return default config if file doesn't exist
         return {
             'thread_templates': {},
             'posting_schedule': {},
             'content_settings': {}
         }
+        
+    # Hand out a copy so callers can't mutate the cached parse
+    return copy.deepcopy(_load(str(config_path), stat.st_mtime_ns, stat.st_size))
 
 def save_config(config):
     """Save configuration to config.yaml"""
@@ -31,3 +47,5 @@ def save_config(config):
     
     with open(config_path, 'w', encoding='utf-8') as f:
         yaml.safe_dump(config, f, default_flow_style=False)
+        
+    _load.cache_clear()
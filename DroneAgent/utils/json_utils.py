@@ -0,0 +1,51 @@
+"""
+JSON Utilities
+Fast JSON encoding and decoding with orjson when it is installed, falling back to the standard library.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+
+def loads(data):
+    """
+    Parse a JSON document.
+
+    Args:
+        data (bytes | str): The raw JSON, e.g. ``response.content``.
+
+    Returns:
+        The decoded Python object.
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON
+            (orjson's error type subclasses it).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON.
+
+    Args:
+        obj: A JSON-serializable object, e.g. a request payload.
+        indent (bool): Pretty-print with two-space indentation instead of compact output.
+
+    Returns:
+        bytes: The encoded document, ready to send as a request body.
+
+    Raises:
+        TypeError: If the object is not JSON-serializable.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
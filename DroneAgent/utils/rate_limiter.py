@@ -0,0 +1,79 @@
+"""
+Rate Limiter
+Thread-safe request budgets for external APIs: a sliding-window quota plus a cap on concurrent requests.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Optional
+
+from .logger import setup_logger
+
+logger = setup_logger(__name__)
+
+
+class RateLimiter:
+    """
+    Tracks one service's request budget across threads.
+
+    Use try_acquire() before a request to spend one call from the window, and
+    the limiter itself as a context manager around the request to bound how
+    many run at once.
+
+    Args:
+        name (str): Service name used in log messages.
+        max_calls (int): Requests allowed per period, or None for no quota.
+        period (float): Window length in seconds.
+        max_concurrent (int): Requests allowed in flight at the same time.
+    """
+
+    def __init__(self, name: str, max_calls: Optional[int] = None, period: float = 3600.0, max_concurrent: int = 4):
+        self.name = name
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def try_acquire(self) -> bool:
+        """Spend one call from the budget; returns False instead of waiting when it is used up."""
+        now = time.monotonic()
+        with self._lock:
+            if now < self._paused_until:
+                return False
+            if self.max_calls is None:
+                return True
+
+            while self._calls and now - self._calls[0] >= self.period:
+                self._calls.popleft()
+            if len(self._calls) >= self.max_calls:
+                return False
+            self._calls.append(now)
+            return True
+
+    def record_response(self, response: Any) -> None:
+        """Pause the budget when a response says the service's quota is exhausted."""
+        remaining = response.headers.get('X-Ratelimit-Remaining')
+        exhausted = response.status_code == 429 or (remaining is not None and remaining.isdigit() and int(remaining) == 0)
+        if not exhausted:
+            return
+
+        # Reset is an epoch timestamp (Pexels); without one, wait out a full window
+        reset = response.headers.get('X-Ratelimit-Reset')
+        wait = self.period
+        if reset and reset.isdigit():
+            wait = max(0.0, int(reset) - time.time())
+
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + wait)
+        logger.warning(f"{self.name} rate limit reached, pausing requests for {wait:.0f}s")
+
+    def __enter__(self):
+        self._slots.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._slots.release()
+        return False